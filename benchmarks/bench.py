@@ -0,0 +1,237 @@
+"""
+Offline benchmarks of sekripgabut against the local mock Splunk server.
+
+Every benchmark runs against a freshly seeded mock server in a child
+process, and reports wall time, events/sec, requests and the peak
+Python memory of the benchmark (tracemalloc). Save a run and compare the
+next one against it:
+
+    python benchmarks/bench.py --days 14 --per-day 5000 --output base.json
+    python benchmarks/bench.py --days 14 --per-day 5000 --compare base.json
+
+Run it from the repository root with sekripgabut installed, or with
+PYTHONPATH=src.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_splunk import DEFAULT_START, MockSplunkServer  # noqa: E402
+
+from sekripgabut.helpers import es_helpers, pemutihan  # noqa: E402
+from sekripgabut.splunk_ops import search  # noqa: E402
+from sekripgabut.splunk_ops.client import close_clients  # noqa: E402
+from sekripgabut.utils import metrics  # noqa: E402
+
+
+TOKEN = "benchmark-token"
+BENCHMARKS = (
+    "get_search_results",
+    "fetch_unclosed_notable_to_file",
+    "pemutihan",
+    "pemutihan_v2",
+)
+
+
+def bench_get_search_results(url, options, workdir):
+    sid = search.set_search_jobs(
+        url, TOKEN, "search `notable`",
+        earliest_time=options.earliest, latest_time=options.latest)
+    search.wait_for_job(url, TOKEN, sid)
+    results = search.get_search_results(
+        url, TOKEN, sid, count=options.page_size)
+    return len(results)
+
+
+def bench_fetch_unclosed_notable_to_file(url, options, workdir):
+    es_helpers.fetch_unclosed_notable_to_file(
+        url, TOKEN,
+        earliest_time=options.earliest,
+        latest_time=options.latest,
+        output_dir=os.path.join(workdir, "unclosed-notables"),
+        parallel=options.parallel,
+        output_format=options.output_format,
+    )
+    return metrics.get_metrics().counters.get("results_fetched", 0)
+
+
+def bench_pemutihan(url, options, workdir):
+    pemutihan.pemutihan(
+        url, TOKEN, os.path.join(workdir, "pemutihan"),
+        options.earliest, options.latest,
+        parallel=options.parallel,
+        workers=options.workers,
+        output_format=options.output_format,
+    )
+    return metrics.get_metrics().counters.get("events_closed", 0)
+
+
+def bench_pemutihan_v2(url, options, workdir):
+    pemutihan.pemutihan_v2(
+        url, TOKEN, options.earliest, options.latest,
+        batch_size=options.page_size,
+        workers=options.workers,
+    )
+    return metrics.get_metrics().counters.get("events_closed", 0)
+
+
+def serve(options, connection):
+    """Child process: seed and run a mock server until terminated."""
+    server = MockSplunkServer(
+        latency=options.latency,
+        job_duration=options.job_duration,
+        failure_rate=options.failure_rate,
+        update_failure_rate=options.update_failure_rate,
+        extra_bytes=options.extra_bytes,
+        job_failure_rate=options.job_failure_rate,
+    )
+    server.state.seed(options.days, options.per_day, DEFAULT_START)
+    connection.send(server.url)
+    server.httpd.serve_forever()
+
+
+def run_benchmark(name, options):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve, args=(options, child), daemon=True)
+    process.start()
+    url = parent.recv()
+    workdir = tempfile.mkdtemp(prefix="sekripgabut-bench-")
+
+    metrics.get_metrics().reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(devnull):
+            events = globals()[f"bench_{name}"](url, options, workdir)
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        close_clients()
+        process.terminate()
+        process.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = metrics.get_metrics().summary()
+    return {
+        "name": name,
+        "seconds": round(elapsed, 3),
+        "events": events,
+        "events_per_second": round(events / elapsed, 1) if elapsed else None,
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "http_requests": summary["counters"].get("http_requests", 0),
+        "latency_p95": {
+            operation: latency["p95"]
+            for operation, latency in summary["latency"].items()
+        },
+    }
+
+
+def print_results(results, baseline=None):
+    baseline = {result["name"]: result for result in baseline or []}
+    header = (f"{'benchmark':32} {'seconds':>9} {'events':>9} "
+              f"{'events/s':>10} {'peak MB':>9} {'requests':>9}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(f"{result['name']:32} {result['seconds']:9.3f} "
+              f"{result['events']:9} {result['events_per_second']:10.1f} "
+              f"{result['peak_memory_mb']:9.2f} "
+              f"{result['http_requests']:9}")
+        base = baseline.get(result["name"])
+        if base:
+            seconds, events_per_second, peak_memory = (
+                _change(result[key], base[key]) for key in (
+                    "seconds", "events_per_second", "peak_memory_mb"))
+            print(f"{'  vs baseline':32} {seconds:>9} {'':9} "
+                  f"{events_per_second:>10} {peak_memory:>9}")
+
+
+def _change(value, base):
+    if not base:
+        return "-"
+    return f"{(value - base) / base * 100:+.1f}%"
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "benchmarks", nargs="*",
+        help=f"Benchmarks to run, any of {', '.join(BENCHMARKS)}. "
+             f"Default to all")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--per-day", type=int, default=2500)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every mock response")
+    parser.add_argument("--job-duration", type=float, default=0.2,
+                        help="Seconds each mock search job runs")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Ratio of mock requests answered with 503")
+    parser.add_argument("--update-failure-rate", type=float, default=0.0,
+                        help="Ratio of event IDs notable_update fails")
+    parser.add_argument("--extra-bytes", type=int, default=0,
+                        help="Padding bytes added to every result row")
+    parser.add_argument("--job-failure-rate", type=float, default=0.0,
+                        help="Ratio of mock search jobs ending FAILED")
+    parser.add_argument("--page-size", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--format", dest="output_format", default="json",
+                        choices=("json", "ndjson"))
+    parser.add_argument("--output", help="Write the results to a JSON file")
+    parser.add_argument("--compare", help="Baseline results JSON file")
+    return parser.parse_args()
+
+
+def main():
+    options = get_args()
+    unknown = set(options.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        sys.exit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    logging.basicConfig(level=logging.WARNING)
+    start = datetime.fromisoformat(DEFAULT_START)
+    options.earliest = start.strftime("%Y-%m-%dT%H:%M:%S")
+    options.latest = (start + timedelta(days=options.days)).strftime(
+        "%Y-%m-%dT%H:%M:%S")
+
+    results = [
+        run_benchmark(name, options)
+        for name in options.benchmarks or BENCHMARKS
+    ]
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)["results"]
+    print_results(results, baseline)
+
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "options": {
+                    key: value for key, value in vars(options).items()
+                    if key not in ("output", "compare")
+                },
+                "results": results,
+            }, file, indent=4)
+        print(f"Results written to: {options.output}")
+
+
+if __name__ == "__main__":
+    main()
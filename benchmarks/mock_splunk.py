@@ -0,0 +1,399 @@
+"""
+Local stand-in for the Splunk REST endpoints sekripgabut uses.
+
+Emulates search jobs, their status and results, the v2 export endpoint,
+`notable_update` and server info, with configurable latency, job
+duration, result sizes and failure rates. Notable events are generated
+per day and spread over the hours of the day.
+
+Run it standalone:
+
+    python benchmarks/mock_splunk.py --port 18089 --days 30 --per-day 5000
+
+or start it from Python with `MockSplunkServer`.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+DEFAULT_START = "2024-01-01"
+
+
+class MockSplunkState:
+    """
+    Notable events and search jobs of the mock server.
+
+    Arguments:
+        latency -- Seconds added to every response.
+        job_duration -- Seconds a search job runs before it is done.
+        failure_rate -- Ratio of requests answered with 503.
+        update_failure_rate -- Ratio of event IDs `notable_update` reports
+        as failed.
+        extra_bytes -- Padding added to every result row.
+        job_failure_rate -- Ratio of search jobs ending FAILED.
+        seed -- Random seed of the failures.
+    """
+
+    def __init__(self, latency=0.0, job_duration=0.3, failure_rate=0.0,
+                 update_failure_rate=0.0, extra_bytes=0,
+                 job_failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.job_duration = job_duration
+        self.failure_rate = failure_rate
+        self.update_failure_rate = update_failure_rate
+        self.extra_bytes = extra_bytes
+        self.job_failure_rate = job_failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.notables = {}
+        self.jobs = {}
+        self.stats = {
+            "requests": 0, "searches": 0, "updates": 0, "failures": 0,
+        }
+
+    def seed(self, days=3, per_day=2500, start=DEFAULT_START, hot=None):
+        """Add {per_day} notable events per day, {hot} maps day to count."""
+        first_day = datetime.fromisoformat(start)
+        for day_number in range(days):
+            day = first_day + timedelta(days=day_number)
+            for i in range((hot or {}).get(day_number, per_day)):
+                digest = hashlib.md5(f"{day}{i}".encode()).hexdigest()
+                event_id = f"{str(uuid.uuid4()).upper()}@@notable@@{digest}"
+                self.notables[event_id] = {
+                    "time": day + timedelta(seconds=(i * 7919) % 86400),
+                    "closed": False,
+                }
+
+    def unclosed(self, earliest_time="", latest_time=""):
+        """(event_id, notable) of unclosed notable events in the range."""
+        earliest = _parse_time(earliest_time)
+        latest = _parse_time(latest_time)
+        with self.lock:
+            return [
+                (event_id, notable)
+                for event_id, notable in self.notables.items()
+                if not notable["closed"]
+                and (earliest is None or notable["time"] >= earliest)
+                and (latest is None or notable["time"] <= latest)
+            ]
+
+    def open_count(self):
+        with self.lock:
+            return sum(
+                not notable["closed"] for notable in self.notables.values())
+
+    def should_fail(self):
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.random.random() < self.failure_rate:
+                self.stats["failures"] += 1
+                return True
+        return False
+
+    def dispatch(self, query, earliest_time="", latest_time=""):
+        """Run {query} right away, the job is done after job_duration."""
+        selected = self.unclosed(earliest_time, latest_time)
+        rows = [self._row(event_id) for event_id, _ in selected]
+
+        if "tstats count" in query and "span=" in query:
+            rows = _count_by(selected, lambda t: t.replace(
+                minute=0, second=0))
+        elif "bin _time span=" in query:
+            rows = _count_by(selected, lambda t: t.replace(
+                hour=0, minute=0, second=0))
+        elif "tstats earliest" in query:
+            rows = [{"_time": _format_time(
+                min(notable["time"] for _, notable in selected))}] \
+                if selected else []
+        elif "stats count" in query:
+            rows = [{"count": str(len(rows))}]
+
+        sid = uuid.uuid4().hex
+        with self.lock:
+            self.stats["searches"] += 1
+            failed = self.random.random() < self.job_failure_rate
+            self.jobs[sid] = {
+                "rows": [] if failed else rows,
+                "failed": failed,
+                "started": time.monotonic(),
+            }
+        return sid
+
+    def close(self, event_ids):
+        """Close {event_ids}, return (success_count, failure_count)."""
+        success_count = failure_count = 0
+        with self.lock:
+            self.stats["updates"] += 1
+            for event_id in event_ids:
+                if self.random.random() < self.update_failure_rate:
+                    failure_count += 1
+                    continue
+                notable = self.notables.get(event_id)
+                if notable is not None:
+                    notable["closed"] = True
+                success_count += 1
+        return success_count, failure_count
+
+    def _row(self, event_id):
+        row = {"event_id": event_id}
+        if self.extra_bytes:
+            row["description"] = "x" * self.extra_bytes
+        return row
+
+
+class MockSplunkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, body=None, content_type="application/json"):
+        if body is None:
+            body = b""
+        elif not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return parse_qs(self.rfile.read(length).decode())
+
+    def _begin(self):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.state.should_fail():
+            self._send(503, {"messages": [{"type": "ERROR",
+                                           "text": "Service Unavailable"}]})
+            return False
+        return True
+
+    def do_POST(self):
+        form = self._form()
+        if not self._begin():
+            return
+        path = urlparse(self.path).path
+        parts = path.strip("/").split("/")
+
+        if path == "/services/search/jobs":
+            sid = self.state.dispatch(
+                _first(form, "search"),
+                _first(form, "earliest_time"),
+                _first(form, "latest_time"))
+            return self._send(201, {"sid": sid})
+
+        if path == "/services/search/v2/export":
+            selected = self.state.unclosed(
+                _first(form, "earliest_time"), _first(form, "latest_time"))
+            body = "".join(
+                json.dumps({"preview": False, "offset": i,
+                            "result": self.state._row(event_id)}) + "\n"
+                for i, (event_id, _) in enumerate(selected))
+            return self._send(200, body.encode())
+
+        if path == "/services/notable_update":
+            event_ids = form.get("ruleUIDs", [])
+            sid = _first(form, "searchID")
+            if sid:
+                job = self.state.jobs.get(sid, {"rows": []})
+                event_ids = [
+                    row["event_id"] for row in job["rows"]
+                    if "event_id" in row
+                ]
+            success_count, failure_count = self.state.close(event_ids)
+            return self._send(200, {
+                "success": True,
+                "success_count": success_count,
+                "failure_count": failure_count,
+                "message": f"{success_count} events updated successfully",
+            })
+
+        if parts[:3] == ["services", "search", "jobs"] and \
+                parts[-1] == "control":
+            return self._send(200, {"messages": []})
+
+        self._send(404, {})
+
+    def do_GET(self):
+        if not self._begin():
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+
+        if url.path == "/services/server/info":
+            return self._send(200, {"entry": [{"content": {
+                "version": "9.1.0", "serverName": "mock-splunk"}}]})
+
+        if len(parts) < 4 or parts[:3] != ["services", "search", "jobs"]:
+            return self._send(404, {})
+
+        job = self.state.jobs.get(parts[3])
+        if job is None:
+            return self._send(404, {})
+        elapsed = time.monotonic() - job["started"]
+        done = elapsed >= self.state.job_duration
+
+        if len(parts) == 4:
+            progress = 1.0 if done else elapsed / self.state.job_duration
+            failed = done and job["failed"]
+            state = "FAILED" if failed else "DONE" if done else "RUNNING"
+            return self._send(200, {"entry": [{"content": {
+                "isDone": done,
+                "isFailed": failed,
+                "dispatchState": state,
+                "messages": [{"type": "FATAL", "text": "Mock search failed"}]
+                if failed else [],
+                "eventCount": len(job["rows"]),
+                "resultCount": len(job["rows"]),
+                "doneProgress": progress,
+                "runDuration": elapsed,
+            }}]})
+
+        if parts[4] != "results":
+            return self._send(404, {})
+        if not done:
+            return self._send(204)
+
+        offset = int(_first(query, "offset") or 0)
+        count = int(_first(query, "count") or 100)
+        rows = job["rows"][offset:offset + count] if count \
+            else job["rows"][offset:]
+        fields = query.get("f")
+        if fields:
+            rows = [
+                {key: row[key] for key in fields if key in row}
+                for row in rows
+            ]
+
+        output_mode = _first(query, "output_mode") or "json"
+        field_names = fields or (list(rows[0]) if rows else [])
+        if output_mode == "json_cols":
+            return self._send(200, {
+                "fields": field_names,
+                "columns": [
+                    [row.get(key) for row in rows] for key in field_names
+                ],
+            })
+        if output_mode == "csv":
+            body = ""
+            if rows:
+                body = ",".join(field_names) + "\n" + "".join(
+                    ",".join(str(row.get(key, "")) for key in field_names)
+                    + "\n" for row in rows)
+            return self._send(200, body.encode(), "text/csv")
+        return self._send(200, {"results": rows, "messages": []})
+
+
+class MockSplunkServer:
+    """
+    Threaded mock Splunk server on localhost.
+
+        with MockSplunkServer(job_duration=0.1) as server:
+            server.state.seed(days=7, per_day=1000)
+            pemutihan_v2(server.url, "token", ...)
+
+    Keyword arguments are passed to `MockSplunkState`.
+    """
+
+    def __init__(self, port=0, **kwargs):
+        self.state = MockSplunkState(**kwargs)
+        handler = type(
+            "BoundMockSplunkHandler", (MockSplunkHandler,),
+            {"state": self.state})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _first(values, key):
+    return (values.get(key) or [""])[0]
+
+
+def _parse_time(value):
+    # Only fixed times are understood, relative ones mean no bound
+    if not value or not value[:4].isdigit():
+        return None
+    return datetime.fromisoformat(value[:19])
+
+
+def _format_time(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000+00:00")
+
+
+def _count_by(selected, bucket_of):
+    counts = {}
+    for _, notable in selected:
+        bucket = bucket_of(notable["time"])
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return [
+        {"_time": _format_time(bucket), "count": str(count)}
+        for bucket, count in sorted(counts.items())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Splunk server")
+    parser.add_argument("--port", type=int, default=18089)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--per-day", type=int, default=2500)
+    parser.add_argument("--start", default=DEFAULT_START)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--job-duration", type=float, default=0.3)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--update-failure-rate", type=float, default=0.0)
+    parser.add_argument("--extra-bytes", type=int, default=0)
+    parser.add_argument("--job-failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockSplunkServer(
+        port=args.port,
+        latency=args.latency,
+        job_duration=args.job_duration,
+        failure_rate=args.failure_rate,
+        update_failure_rate=args.update_failure_rate,
+        extra_bytes=args.extra_bytes,
+        job_failure_rate=args.job_failure_rate,
+    )
+    server.state.seed(args.days, args.per_day, args.start)
+    print(f"Mock Splunk listening on {server.url} "
+          f"({len(server.state.notables)} notable events)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Startup time budget of the sekripgabut CLI.
+
+Runs quick CLI invocations in fresh interpreters, reports the median
+wall time of each on top of a bare interpreter start and the heavy
+modules it imported, and fails when a command is over budget or imports
+a module it should not need:
+
+    python benchmarks/startup.py --budget-ms 100
+
+Run it from the repository root with sekripgabut installed, or with
+PYTHONPATH=src.
+"""
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Invocations that must stay cheap: argv of each
+QUICK_COMMANDS = (
+    ["--help"],
+    ["es", "--help"],
+    ["pemutihan", "--help"],
+    ["splunk", "--help"],
+)
+
+# Modules no quick invocation needs
+HEAVY_MODULES = (
+    "requests",
+    "jmespath",
+    "aiohttp",
+    "zstandard",
+    "sekripgabut.splunk_ops.client",
+    "sekripgabut.helpers.es_helpers",
+    "sekripgabut.helpers.pemutihan",
+    "sekripgabut.helpers.aio_pemutihan",
+)
+
+# Run the CLI, then report the heavy modules it imported
+PROBE = f"""
+import json, sys
+from sekripgabut import cli
+try:
+    cli.main(sys.argv[1:])
+except SystemExit:
+    pass
+heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+sys.__stderr__.write("\\nSTARTUP " + json.dumps(heavy) + "\\n")
+"""
+
+
+def measure(argv, runs, workdir):
+    """Median seconds and heavy modules of `sekripgabut {argv}`."""
+    timings = []
+    heavy = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-c", PROBE, *argv],
+            cwd=workdir, capture_output=True, text=True)
+        timings.append(time.perf_counter() - started)
+        for line in process.stderr.splitlines():
+            if line.startswith("STARTUP "):
+                heavy = json.loads(line[len("STARTUP "):])
+    return statistics.median(timings), heavy
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=7,
+                        help="Runs per command, the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help=("Max median startup time per command, on top "
+                              "of the bare interpreter"))
+    return parser.parse_args()
+
+
+def main():
+    options = get_args()
+    # The CLI log file goes to a scratch directory
+    workdir = tempfile.mkdtemp(prefix="sekripgabut-startup-")
+
+    timings = []
+    for _ in range(options.runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        timings.append(time.perf_counter() - started)
+    interpreter = statistics.median(timings)
+
+    failed = False
+    print(f"{'command':24} {'ms':>8} {'+ms':>8}  heavy modules")
+    print("-" * 60)
+    for argv in QUICK_COMMANDS:
+        seconds, heavy = measure(argv, options.runs, workdir)
+        overhead = (seconds - interpreter) * 1000
+        over = overhead > options.budget_ms
+        failed = failed or over or bool(heavy)
+        flag = " OVER BUDGET" if over else ""
+        print(f"{' '.join(argv):24} {seconds * 1000:8.1f} {overhead:8.1f}  "
+              f"{', '.join(heavy) or '-'}{flag}")
+    print(f"Bare interpreter: {interpreter * 1000:.1f} ms, "
+          f"budget: {options.budget_ms:g} ms")
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,10 @@ setup(
         "requests>=2.32.3",
         "jmespath>=1.0.1",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.9"],
+        "zstd": ["zstandard>=0.18"],
+    },
     entry_points={
         "console_scripts": [
             "sekripgabut=sekripgabut.cli:main",
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import time
+
+from sekripgabut.splunk_ops.retry import (
+    DEFAULT_BREAKER_RESET,
+    DEFAULT_BREAKER_THRESHOLD,
+    DEFAULT_MAX_ATTEMPTS,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    is_transient_error,
+    parse_retry_after,
+)
+from sekripgabut.utils import metrics
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency, pip install sekripgabut[async]
+    aiohttp = None
+
+
+# Defaults
+DEFAULT_LIMIT = 100
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 300
+
+
+class AsyncSplunkClient:
+    """Asyncio HTTP client for a single Splunk instance.
+
+    Every request shares one `aiohttp.ClientSession` and its connection
+    pool on the running event loop. Use it as an async context manager:
+
+        async with AsyncSplunkClient(base_url, token) as client:
+            info = await get_server_info(client)
+
+    Arguments:
+    base_url -- Splunk instance base URL.
+    token -- Splunk access token.
+
+    Keyword arguments:
+    limit -- Max open connections. Default: 100.
+    connect_timeout -- Connect timeout in seconds.
+    read_timeout -- Socket read timeout in seconds.
+    verify -- Verify TLS certificate. Default: False.
+    retry_policy -- `RetryPolicy` of transient failures.
+    breaker -- `CircuitBreaker` pausing requests when Splunk is saturated.
+    """
+
+    def __init__(self, base_url, token, limit=DEFAULT_LIMIT,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 verify=False,
+                 retry_policy=None,
+                 breaker=None):
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp is required for the async client, install it with "
+                "'pip install sekripgabut[async]'")
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.limit = limit
+        self.timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout)
+        self.verify = verify
+        self.retry_policy = retry_policy or RetryPolicy(DEFAULT_MAX_ATTEMPTS)
+        self.breaker = breaker or CircuitBreaker(
+            DEFAULT_BREAKER_THRESHOLD, DEFAULT_BREAKER_RESET,
+            name=self.base_url)
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, ssl=None if self.verify else False)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.token}"},
+            )
+            logging.debug(
+                f"Opened async Splunk client for {self.base_url} "
+                f"(limit={self.limit})")
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def url(self, path):
+        """Build full URL of the {path} endpoint."""
+        return f"{self.base_url}{path}"
+
+    async def request(self, method, path, operation=None, idempotent=None,
+                      **kwargs):
+        """Send a request to the {path} endpoint.
+
+        Transient failures are retried like `SplunkClient.request`.
+
+        Keyword arguments:
+        operation -- Name the latency is recorded under. Default: "http".
+        idempotent -- Whether the request is safe to send twice. Default:
+        by method, POST is not.
+
+        Returns:
+        tuple -- (status, body), body is the decoded JSON response, or the
+        text if it is not JSON, or None if empty.
+        """
+        if self.session is None:
+            await self.open()
+        policy = self.retry_policy
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            trial = None
+            waiting = False
+            try:
+                trial = self.breaker.before_request()
+                async with self.session.request(
+                        method, self.url(path), **kwargs) as response:
+                    text = await response.text()
+            except Exception as e:
+                # Waiting for a running half-open trial is not an attempt
+                waiting = getattr(e, "trial_running", False)
+                if not isinstance(e, CircuitOpenError):
+                    if not is_transient_error(e):
+                        raise
+                    metrics.inc("http_errors")
+                    self.breaker.record_failure()
+                if not waiting and not policy.should_retry_error(
+                        method, e, attempt, idempotent):
+                    raise
+                delay = max(policy.delay(attempt), self.breaker.remaining())
+                logging.warning(
+                    f"{method} {path} failed ({e!r}), retry "
+                    f"{attempt + 1} in {delay:.2f}s")
+            else:
+                metrics.inc("http_requests")
+                metrics.inc("bytes_received", len(text.encode()))
+                if response.status >= 400:
+                    metrics.inc("http_errors")
+                if response.status not in policy.retry_statuses:
+                    self.breaker.record_success()
+                    return response.status, _decode(text)
+
+                self.breaker.record_failure()
+                if not policy.should_retry_status(
+                        method, response.status, attempt, idempotent):
+                    return response.status, _decode(text)
+                delay = policy.delay(attempt, parse_retry_after(
+                    response.headers.get("Retry-After")))
+                logging.warning(
+                    f"{method} {path} returned {response.status}, "
+                    f"retry {attempt + 1} in {delay:.2f}s")
+            finally:
+                self.breaker.end_trial(trial)
+                metrics.observe(
+                    operation or metrics.OP_HTTP, time.perf_counter() - start)
+
+            if not waiting:
+                metrics.inc("retries")
+                attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+
+def _decode(text):
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
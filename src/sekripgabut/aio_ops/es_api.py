@@ -0,0 +1,52 @@
+import logging
+
+from sekripgabut.es_ops.es_api import NOTABLE_UPDATE
+from sekripgabut.splunk_ops.models import NotableUpdateResult
+from sekripgabut.utils import metrics
+
+
+async def update_notable_event(client, status=None, ruleUIDs=None,
+                               searchID=None, newOwner="", urgency="",
+                               disposition=None, comment=""):
+    """Update the status, urgency, owner, or comment of one or more findings.
+
+    Async equivalent of `es_ops.es_api.update_notable_event`.
+
+    Returns:
+    dict - JSON response from the API.
+
+    Raises:
+    ValueError -- If the API reports a failure.
+    """
+    if not (ruleUIDs or searchID):
+        raise ValueError("Either 'ruleUIDs' or 'searchID' must be provided")
+
+    fields = {
+        "searchID": searchID,
+        "newOwner": newOwner,
+        "urgency": urgency,
+        "status": status,
+        "disposition": disposition,
+        "comment": comment,
+    }
+    # Repeated form fields, one per finding ID
+    data = [("ruleUIDs", rule_uid) for rule_uid in ruleUIDs or []]
+    data.extend(
+        (key, str(value)) for key, value in fields.items() if value)
+
+    # Setting the same status twice is harmless, safe to retry
+    status_code, response_data = await client.post(
+        NOTABLE_UPDATE, data=data, operation=metrics.OP_NOTABLE_UPDATE,
+        idempotent=True)
+
+    result = NotableUpdateResult.from_response(response_data)
+    if status_code == 200 and result.success:
+        logging.info(f"Successfully update events: {response_data}")
+        metrics.inc("events_closed", result.success_count)
+        metrics.inc("events_failed", result.failure_count)
+        return response_data
+
+    error_message = result.message or "Unknown error occurred"
+    logging.error(
+        f"Error: {error_message}. {len(ruleUIDs) if ruleUIDs else ''}")
+    raise ValueError(f"Update failed: {error_message}")
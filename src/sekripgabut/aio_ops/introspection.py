@@ -0,0 +1,24 @@
+import logging
+
+from sekripgabut.splunk_ops.introspection import SERVER_INFO
+
+
+async def get_server_info(client):
+    """Get Splunk instance information.
+
+    Async equivalent of `splunk_ops.introspection.get_server_info`.
+
+    Returns:
+    dict -- JSON response from splunk server info. Otherwise None
+    """
+    try:
+        status, body = await client.get(
+            SERVER_INFO, params={"output_mode": "json"})
+        if status == 200:
+            return body
+        logging.error(
+            f"HTTPError: {status} when accessing {client.url(SERVER_INFO)}")
+    except Exception as e:
+        logging.error(
+            f"Failed to connect to: {client.url(SERVER_INFO)}. Error: {e}")
+    return None
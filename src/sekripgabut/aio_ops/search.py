@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+
+from sekripgabut.splunk_ops.search import (
+    POLL_BACKOFF,
+    POLL_INITIAL_INTERVAL,
+    POLL_MAX_INTERVAL,
+    RESULTS_JSON,
+    SEARCH_JOBS,
+    SEARCH_JOBS_SID,
+    SEARCH_JOBS_SID_CONTROL,
+    SEARCH_JOBS_SID_RESULTS,
+    SearchJobFailed,
+    decode_results_page,
+    page_length,
+)
+from sekripgabut.splunk_ops.models import SearchJobStatus
+from sekripgabut.utils import metrics
+
+
+async def set_search_jobs(client, query, earliest_time="", latest_time="now",
+                          output_mode="json", **kwargs):
+    """Start a new search and return the search ID (<sid>).
+
+    Async equivalent of `splunk_ops.search.set_search_jobs`.
+
+    Raises:
+    Exception -- If the request fails or no SID is returned.
+    """
+    payload = {
+        "search": query,
+        "earliest_time": earliest_time,
+        "latest_time": latest_time,
+        "output_mode": output_mode,
+        **kwargs
+    }
+    status, body = await client.post(
+        SEARCH_JOBS, data=payload, operation=metrics.OP_DISPATCH)
+    if status not in (200, 201):
+        raise Exception(
+            f"Request to {client.url(SEARCH_JOBS)} failed: "
+            f"Code: {status}, Response: {body}")
+
+    sid = body.get("sid") if isinstance(body, dict) else None
+    if not sid:
+        raise ValueError(
+            "Failed to retrieve search ID (sid) from the response.")
+    logging.info(f"Search job created successfully with SID: {sid}")
+    return sid
+
+
+async def get_search_job_by_sid(client, sid, output_mode="json", **kwargs):
+    """Get the {sid} search job status.
+
+    Async equivalent of `splunk_ops.search.get_search_job_by_sid`.
+    """
+    path = SEARCH_JOBS_SID.format(search_id=sid)
+    params = {"output_mode": output_mode, **kwargs}
+    status, body = await client.get(
+        path, params=params, operation=metrics.OP_POLL)
+    if status != 200:
+        raise Exception(
+            f"Request to {client.url(path)} failed: "
+            f"Code: {status}, Response: {body}")
+    return body
+
+
+async def cancel_search_job(client, sid):
+    """Cancel the {sid} search job."""
+    path = SEARCH_JOBS_SID_CONTROL.format(search_id=sid)
+    status, body = await client.post(
+        path, data={"action": "cancel", "output_mode": "json"})
+    if status != 200:
+        raise Exception(f"Failed to cancel search job {sid}: {body}")
+    logging.info(f"Search job {sid} cancelled.")
+
+
+async def wait_for_job(client, sid, timeout=None,
+                       initial_interval=POLL_INITIAL_INTERVAL,
+                       max_interval=POLL_MAX_INTERVAL,
+                       backoff=POLL_BACKOFF):
+    """Wait until the {sid} search job is done.
+
+    Async equivalent of `splunk_ops.search.wait_for_job`, cancel it by
+    cancelling the awaiting task.
+
+    Returns:
+    tuple -- (status, waited), the last `SearchJobStatus` and the seconds
+    spent waiting.
+
+    Raises:
+    SearchJobFailed -- If the job ends FAILED.
+    """
+    started = time.monotonic()
+    deadline = started + timeout if timeout else None
+    interval = initial_interval
+
+    try:
+        while True:
+            status = SearchJobStatus.from_response(
+                await get_search_job_by_sid(client, sid), sid)
+
+            if status.failed:
+                raise SearchJobFailed(sid, status.messages)
+
+            if status.is_done:
+                waited = time.monotonic() - started
+                metrics.observe("job_wait", waited)
+                return status, waited
+
+            delay = interval
+            remaining = status.remaining_seconds()
+            if remaining is not None:
+                delay = min(delay, max(initial_interval, remaining))
+            delay = min(delay, max_interval)
+
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise TimeoutError(
+                        f"Search job {sid} is not done after {timeout}s")
+                delay = min(delay, left)
+
+            await asyncio.sleep(delay)
+            interval = min(interval * backoff, max_interval)
+    except (TimeoutError, asyncio.CancelledError):
+        await asyncio.shield(cancel_search_job(client, sid))
+        raise
+
+
+async def iter_search_results(client, sid, page_size=1000, fields=None,
+                              output_mode=RESULTS_JSON, columns=False,
+                              **kwargs):
+    """Iterate search results of the {sid} search job page by page.
+
+    Async equivalent of `splunk_ops.search.iter_search_results`.
+
+    Yields:
+    list or dict -- A page of results, rows or columns if {columns}.
+    """
+    path = SEARCH_JOBS_SID_RESULTS.format(search_id=sid)
+    params = {
+        "output_mode": output_mode,
+        "count": page_size,
+        "offset": 0,
+        **kwargs
+    }
+    page_count = int(params["count"])
+
+    while True:
+        # Repeated `f` parameters need a list of pairs with aiohttp
+        query = list(params.items())
+        query.extend(("f", field) for field in fields or [])
+        status, body = await client.get(
+            path, params=query, operation=metrics.OP_RESULTS_PAGE)
+
+        if status == 204:
+            # No result yet; wait for the job to complete
+            await wait_for_job(client, sid)
+            continue
+
+        if status not in (200, 201):
+            raise Exception(f"Failed to fetch results: {body}")
+
+        results = decode_results_page(
+            body, params["output_mode"], fields, columns)
+        result_count = page_length(results)
+        if not result_count:
+            break
+
+        metrics.inc("results_fetched", result_count)
+        yield results
+
+        if result_count < page_count:
+            break
+        params["offset"] += page_count  # get another page
+
+
+async def get_search_results(client, sid, **kwargs):
+    """Fetch all search results of the {sid} search job."""
+    all_results = []
+    async for results in iter_search_results(client, sid, **kwargs):
+        all_results.extend(results)
+    return all_results
@@ -0,0 +1,222 @@
+"""
+Subcommands of the `sekripgabut` CLI.
+
+A command is a module (or any object) with:
+
+    HELP = "One line help"          # optional
+
+    def add_arguments(parser):       # fill its argparse subparser
+        ...
+
+    def run(args, config):           # run it with the parsed config
+        ...
+
+Built-in commands live in this package. Other packages add commands
+through the `sekripgabut.commands` entry point group:
+
+    entry_points={
+        "sekripgabut.commands": [
+            "hello = my_package.hello_command",
+        ],
+    }
+
+Commands are imported only when chosen, keep heavy imports (requests,
+jmespath, the helpers) inside `run` so quick commands start fast.
+"""
+import importlib
+import json
+import logging
+import sys
+
+
+ENTRY_POINT_GROUP = "sekripgabut.commands"
+
+# Built-in commands: name -> (module, help)
+BUILTIN_COMMANDS = {
+    "es": (
+        "sekripgabut.commands.es",
+        "Collection of Splunk Enterprise Security operations"),
+    "pemutihan": (
+        "sekripgabut.commands.pemutihan",
+        "Bersih-bersih..."),
+    "splunk": (
+        "sekripgabut.commands.splunk",
+        "Collection of Splunk Enterprise operations"),
+}
+
+
+def find_commands(include_plugins=True):
+    """
+    Every available command, without importing any of them.
+
+    Keyword arguments:
+        include_plugins -- Look up entry point commands too. Default: True.
+
+    Returns:
+        dict -- Command name to (target, help), target is a module name
+        or an entry point. Built-in commands win over plugins.
+    """
+    commands = dict(BUILTIN_COMMANDS)
+    if include_plugins:
+        for entry_point in _command_entry_points():
+            commands.setdefault(entry_point.name, (
+                entry_point, f"Plugin command ({entry_point.value})"))
+    return commands
+
+
+def load_command(target):
+    """Import the command of a `find_commands` target."""
+    if isinstance(target, str):
+        return importlib.import_module(target)
+    return target.load()
+
+
+def find_command_name(argv, names):
+    """The first of {argv} naming one of {names}, None if none does."""
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in ("--config",):
+            # Global option value, not a command
+            skip = True
+        elif not arg.startswith("-"):
+            return arg if arg in names else None
+    return None
+
+
+def connect(config):
+    """
+    Share one pooled client for every Splunk REST call of the command.
+
+    Returns:
+        tuple -- (base_url, token) from the config.
+    """
+    from sekripgabut.splunk_ops.client import (
+        configure_client,
+        load_client_options,
+    )
+
+    token = config.get('Auth', 'token')
+    base_url = config.get('Splunk', 'base_url')
+    configure_client(base_url, token, **load_client_options(config))
+    return base_url, token
+
+
+def fan_out(args, config, task):
+    """
+    Run {task} against every Splunk target chosen by --targets.
+
+    Each target gets its own config view (`fanout.target_config`) and its
+    own pooled client configured from it, so [Target:<name>:Client],
+    [Target:<name>:Search] and [Target:<name>:Notable] keys apply to that
+    target only.
+
+    Arguments:
+        task -- Called as task(name, target_config, base_url, token).
+
+    Returns:
+        dict -- Report of `fanout.run_fanout`, None if --targets names an
+        unknown target.
+    """
+    from sekripgabut.helpers import fanout
+
+    try:
+        targets = fanout.select_targets(
+            fanout.load_targets(config), args.targets)
+    except ValueError as e:
+        logging.error(f"Invalid --targets: {e}")
+        return None
+
+    def run_target(name, base_url, token):
+        target = fanout.target_config(config, name, base_url, token)
+        return task(name, target, *connect(target))
+
+    max_targets = getattr(args, 'max_targets', None) or config.getint(
+        'Fanout', 'max_targets', fallback=0)
+    return fanout.run_fanout(targets, run_target, max_targets or None)
+
+
+def close_clients():
+    """Close the shared clients, if the command opened any."""
+    # Never import the client (and requests) just to close nothing
+    client = sys.modules.get("sekripgabut.splunk_ops.client")
+    if client is not None:
+        client.close_clients()
+
+
+def get_max_search_jobs(args, config):
+    """Max concurrent search jobs from arguments, config or default."""
+    from sekripgabut.helpers.es_helpers import DEFAULT_MAX_SEARCH_JOBS
+
+    max_search_jobs = getattr(args, 'max_search_jobs', None)
+    if max_search_jobs:
+        return max_search_jobs
+    return config.getint(
+        'Search', 'max_concurrent_jobs',
+        fallback=DEFAULT_MAX_SEARCH_JOBS)
+
+
+def get_target_events(args, config):
+    """Planned range size from arguments or config, None for fixed ranges."""
+    target_events = getattr(args, 'target_events', None)
+    if target_events:
+        return target_events
+    return config.getint('Search', 'target_events', fallback=0) or None
+
+
+def get_close_options(args, config):
+    """Concurrent notable_update workers and rate limiter.
+
+    Example:
+    [Notable]
+    max_in_flight = 4
+    rate_per_second = 5
+    burst = 10
+    """
+    from sekripgabut.helpers.pipeline import DEFAULT_CLOSE_WORKERS
+    from sekripgabut.utils.rate_limit import TokenBucket
+
+    workers = getattr(args, 'workers', None) or config.getint(
+        'Notable', 'max_in_flight',
+        fallback=DEFAULT_CLOSE_WORKERS)
+
+    rate = getattr(args, 'rate', None) or config.getfloat(
+        'Notable', 'rate_per_second', fallback=0)
+    rate_limiter = None
+    if rate:
+        burst = config.getfloat('Notable', 'burst', fallback=None)
+        rate_limiter = TokenBucket(rate, burst)
+        logging.info(
+            f"notable_update limited to {rate} requests/s "
+            f"(burst {rate_limiter.capacity:g}), {workers} in flight")
+    return {"workers": workers, "rate_limiter": rate_limiter}
+
+
+def write_metrics(args):
+    """Export the run metrics requested by --metrics-json/--metrics-prom."""
+    from sekripgabut.utils import metrics
+
+    registry = metrics.get_metrics()
+    logging.info(f"Run metrics: {json.dumps(registry.summary())}")
+    try:
+        if getattr(args, 'metrics_json', None):
+            registry.write_json(args.metrics_json)
+        if getattr(args, 'metrics_prom', None):
+            registry.write_prometheus(args.metrics_prom)
+    except OSError as e:
+        logging.error(f"Failed to write metrics: {e}")
+
+
+def _command_entry_points():
+    from importlib.metadata import entry_points
+
+    try:
+        found = entry_points()
+        if hasattr(found, "select"):
+            return list(found.select(group=ENTRY_POINT_GROUP))
+        # Python 3.9 returns a dict of groups
+        return list(found.get(ENTRY_POINT_GROUP, []))
+    except Exception as e:
+        logging.warning(f"Failed to look up plugin commands: {e}")
+        return []
@@ -0,0 +1,103 @@
+import argparse
+import functools
+import logging
+
+from sekripgabut import commands
+from sekripgabut.helpers import args_helper
+
+
+def add_arguments(parser):
+    args_helper.add_es_arguments(parser)
+
+
+def run(args, config):
+    if args.targets:
+        try:
+            commands.fan_out(
+                args, config, functools.partial(_run_target, args))
+        finally:
+            commands.close_clients()
+            commands.write_metrics(args)
+        return
+
+    base_url, token = commands.connect(config)
+    try:
+        _run(args, config, base_url, token)
+    finally:
+        commands.close_clients()
+        commands.write_metrics(args)
+
+
+def _run_target(args, name, config, base_url, token):
+    from sekripgabut.helpers.fanout import target_path
+
+    # Dump files of each target in its own directory
+    args = argparse.Namespace(**vars(args))
+    args.path = target_path(args.path or "unclosed-notables", name)
+    return _run(args, config, base_url, token)
+
+
+def _run(args, config, base_url, token):
+    from sekripgabut.helpers import es_helpers
+
+    earliest_time = getattr(args, 'earliest', '')
+    latest_time = getattr(args, 'latest', 'now')
+
+    if args.first_notable_index:
+        logging.info("Fetching the first notable index time...")
+        results = es_helpers.find_first_notable_time(
+            base_url,
+            token,
+            earliest_time=earliest_time,
+            latest_time=latest_time
+        )
+
+        if results:
+            logging.info(f"First notable index time: {results}")
+        else:
+            logging.error(
+                "Failed to retrieve the first notable index time")
+        return results
+    elif args.weekly_unclosed_notable and args.use_async:
+        from sekripgabut.helpers import aio_pemutihan
+        path = getattr(args, 'path', "unclosed-notables")
+        results = aio_pemutihan.run_fetch_unclosed_notable_to_file_async(
+            base_url,
+            token,
+            earliest_time=earliest_time,
+            latest_time=latest_time,
+            output_dir=path,
+            max_search_jobs=commands.get_max_search_jobs(args, config),
+            output_format=args.output_format,
+            compression=args.compression,
+            target_events=commands.get_target_events(args, config),
+        )
+
+        if results:
+            logging.info("Un-closed notable fetched")
+        else:
+            logging.critical("Failed to fetch notables")
+        return results
+    elif args.weekly_unclosed_notable:
+        path = getattr(args, 'path', "unclosed-notables")
+        results = es_helpers.fetch_unclosed_notable_to_file(
+            base_url,
+            token,
+            earliest_time=earliest_time,
+            latest_time=latest_time,
+            output_dir=path,
+            parallel=args.parallel,
+            max_search_jobs=commands.get_max_search_jobs(args, config),
+            search_mode=args.search_mode,
+            output_format=args.output_format,
+            compression=args.compression,
+            target_events=commands.get_target_events(args, config),
+        )
+
+        if results:
+            logging.info("Un-closed notable fetched")
+        else:
+            logging.critical("Failed to fetch notables")
+        return results
+    else:
+        logging.error("Invalid 'es' subcommand argument(s)")
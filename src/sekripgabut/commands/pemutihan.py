@@ -0,0 +1,148 @@
+import argparse
+import functools
+import logging
+
+from sekripgabut import commands
+from sekripgabut.helpers import args_helper
+
+
+def add_arguments(parser):
+    args_helper.add_pemutihan_arguments(parser)
+
+
+def run(args, config):
+    if args.targets:
+        try:
+            commands.fan_out(
+                args, config, functools.partial(_run_target, args))
+        finally:
+            commands.close_clients()
+            commands.write_metrics(args)
+        return
+
+    base_url, token = commands.connect(config)
+    try:
+        _run(args, config, base_url, token)
+    finally:
+        commands.close_clients()
+        commands.write_metrics(args)
+
+
+def _run_target(args, name, config, base_url, token):
+    from sekripgabut.helpers.checkpoint import DEFAULT_CHECKPOINT_FILE
+    from sekripgabut.helpers.fanout import target_path
+
+    # Event ID files, checkpoint and closed index of each target apart
+    args = argparse.Namespace(**vars(args))
+    args.path = target_path(args.path, name)
+    args.closed_index = target_path(args.closed_index, name)
+    if args.checkpoint or args.resume:
+        args.checkpoint = target_path(
+            args.checkpoint or DEFAULT_CHECKPOINT_FILE, name)
+    return _run(args, config, base_url, token)
+
+
+def _run(args, config, base_url, token):
+    if args.ver == "v2" and args.use_async:
+        from sekripgabut.helpers import aio_pemutihan
+        if args.by_sid:
+            logging.warning("--by-sid is not supported with --async.")
+        if args.adaptive_batch:
+            logging.warning(
+                "--adaptive-batch is not supported with --async, "
+                "batches are one results page.")
+        close_options = commands.get_close_options(args, config)
+        try:
+            return aio_pemutihan.run_pemutihan_async(
+                base_url, token,
+                getattr(args, 'earliest', ''),
+                getattr(args, 'latest', 'now'),
+                max_search_jobs=commands.get_max_search_jobs(args, config),
+                max_in_flight=close_options["workers"],
+                job_timeout=args.job_timeout,
+                target_events=commands.get_target_events(args, config),
+                prescan=args.prescan,
+                rate_limiter=close_options["rate_limiter"],
+                checkpoint=args.checkpoint,
+                resume=args.resume,
+                closed_index=args.closed_index,
+            )
+        except Exception as e:
+            logging.critical(
+                f"Failed to execute async 'pemutihan_v2': {e}")
+
+    elif args.ver == "v2":
+        from sekripgabut.helpers import pemutihan
+
+        # Extract time range arguments
+        earliest = getattr(args, 'earliest', '')
+        latest = getattr(args, 'latest', 'now')
+
+        # Validate log arguments
+        if not earliest:
+            logging.warning(
+                "No 'earliest' provided; using default (None)."
+            )
+
+        if latest == 'now':
+            logging.info(
+                "No 'latest' time provided; using default ('now')."
+            )
+
+        # Call pemutihan v2 function
+        try:
+            return pemutihan.pemutihan_v2(
+                base_url, token, earliest, latest,
+                job_timeout=args.job_timeout,
+                checkpoint=args.checkpoint,
+                resume=args.resume,
+                closed_index=args.closed_index,
+                adaptive_batch=args.adaptive_batch,
+                target_events=commands.get_target_events(args, config),
+                prescan=args.prescan,
+                by_sid=args.by_sid,
+                **commands.get_close_options(args, config),
+            )
+        except Exception as e:
+            logging.critical(f"Failed to execute 'pemutihan_v2': {e}")
+
+    elif args.ver is None:
+        from sekripgabut.helpers import pemutihan
+
+        # Extract time range arguments
+        earliest = getattr(args, 'earliest', None)
+        latest = getattr(args, 'latest', 'now')
+
+        # Validate an log arguments
+        if not args.path:
+            logging.error("Path is required for the 'pemutihan' command.")
+            return
+
+        if not earliest:
+            logging.warning(
+                "No 'earliest' time provided; using default (None).")
+
+        if latest == 'now':
+            logging.info(
+                "'latest' time not provided; using default ('now').")
+
+        # Call the pemutihan function
+        try:
+            return pemutihan.pemutihan(
+                base_url, token, args.path, earliest, latest,
+                parallel=args.parallel,
+                max_search_jobs=commands.get_max_search_jobs(args, config),
+                search_mode=args.search_mode,
+                closed_index=args.closed_index,
+                adaptive_batch=args.adaptive_batch,
+                output_format=args.output_format,
+                compression=args.compression,
+                parse_workers=args.parse_workers or config.getint(
+                    'Notable', 'parse_workers', fallback=1),
+                dedup_all=args.dedup_all,
+                target_events=commands.get_target_events(args, config),
+                **commands.get_close_options(args, config))
+        except Exception as e:
+            logging.critical(f"Failed to execute 'pemutihan': {e}")
+    else:
+        print(f"Error: unknown version '{args.ver}'")
@@ -0,0 +1,84 @@
+import functools
+import json
+import logging
+
+from sekripgabut import commands
+from sekripgabut.helpers import args_helper
+
+
+def add_arguments(parser):
+    args_helper.add_splunk_arguments(parser)
+
+    splunk_subparsers = parser.add_subparsers(
+        dest="subcommand", required=False
+    )
+    # Define 'splunk search' subcommand
+    search_parser = splunk_subparsers.add_parser(
+        "search",
+        help="Collection of splunk search endpoints operations"
+    )
+
+    # Add 'splunk search' arguments
+    args_helper.add_search_arguments(search_parser)
+
+
+def run(args, config):
+    if args.targets:
+        try:
+            report = commands.fan_out(
+                args, config, functools.partial(_collect, args))
+        finally:
+            commands.close_clients()
+        if report:
+            print(json.dumps({
+                name: result["result"] if result["ok"] else {
+                    "error": result["error"] or "failed, see the log"}
+                for name, result in report["targets"].items()
+            }, indent=4))
+        return
+
+    base_url, token = commands.connect(config)
+    try:
+        _run(args, base_url, token)
+    finally:
+        commands.close_clients()
+
+
+def _collect(args, name, config, base_url, token):
+    """--info and --version of one target, None if it is unreachable."""
+    from sekripgabut.splunk_ops.introspection import (
+        SERVER_VERSION,
+        get_server_info,
+    )
+
+    # One request for both
+    splunk_info = get_server_info(base_url, token)
+    if splunk_info is None:
+        return None
+    result = {}
+    if args.info:
+        result["info"] = splunk_info
+    if args.version:
+        result["version"] = SERVER_VERSION.search(splunk_info)
+    return result
+
+
+def _run(args, base_url, token):
+    from sekripgabut.splunk_ops.introspection import (
+        get_server_info,
+        get_splunk_version,
+    )
+
+    if args.info:
+        try:
+            splunk_info = get_server_info(base_url, token)
+            print(json.dumps(splunk_info, indent=4))
+        except Exception as e:
+            logging.error(f"Failed to get splunk instance info: {e}")
+
+    if args.version:
+        try:
+            version = get_splunk_version(base_url, token)
+            print(version)
+        except Exception as e:
+            logging.error(f"Unexpected error occurred: {e}")
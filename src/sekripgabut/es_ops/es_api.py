@@ -1,10 +1,10 @@
 import requests
 import json
-import urllib3
 import logging
-
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from sekripgabut.splunk_ops.client import get_client
+from sekripgabut.splunk_ops.models import NotableUpdateResult
+from sekripgabut.splunk_ops.retry import RETRY_STATUS_CODES
+from sekripgabut.utils import metrics
 
 
 NOTABLE_UPDATE = "/services/notable_update"
@@ -34,8 +34,7 @@ def update_notable_event(base_url, token, status=None, ruleUIDs=[],
     if not (ruleUIDs or searchID):
         raise ValueError("Either 'ruleUIDs' or 'searchID' must be provided")
 
-    endpoint = f"{base_url}{NOTABLE_UPDATE}"
-    headers = {"Authorization": f"Bearer {token}"}
+    client = get_client(base_url, token)
     data = {
         key: value for key, value in {
             "ruleUIDs": ruleUIDs,
@@ -52,8 +51,10 @@ def update_notable_event(base_url, token, status=None, ruleUIDs=[],
         logging.info("Starting to update events...")
 
         # Send the API request
-        response = requests.post(endpoint, headers=headers, data=data,
-                                 verify=False)
+        # Setting the same status twice is harmless, safe to retry
+        response = client.post(
+            NOTABLE_UPDATE, data=data, operation=metrics.OP_NOTABLE_UPDATE,
+            idempotent=True)
 
         # Parse and log response details
         try:
@@ -65,12 +66,18 @@ def update_notable_event(base_url, token, status=None, ruleUIDs=[],
             raise
 
         # Check if the API reported success
-        if response.status_code == 200 and response_data.get("success", False):
+        result = NotableUpdateResult.from_response(response_data)
+        if response.status_code == 200 and result.success:
             logging.info(f"Successfully update events: {response_data}")
+            metrics.inc("events_closed", result.success_count)
+            metrics.inc("events_failed", result.failure_count)
             return response_data
         else:
-            error_message = response_data.get(
-                "message", "Unknown error occurred")
+            # Transient statuses left after the client retries keep their
+            # status, so callers can tell them apart
+            if response.status_code in RETRY_STATUS_CODES:
+                response.raise_for_status()
+            error_message = result.message or "Unknown error occurred"
             logging.error(
                 # f"Failed to update events ({ruleUIDs or searchID}):"
                 f"Error: {error_message}. {len(ruleUIDs) if ruleUIDs else ''}"
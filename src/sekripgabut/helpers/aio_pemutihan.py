@@ -0,0 +1,512 @@
+import asyncio
+import logging
+import os
+import shutil
+
+from sekripgabut.aio_ops.client import AsyncSplunkClient
+from sekripgabut.aio_ops.es_api import update_notable_event
+from sekripgabut.aio_ops.search import (
+    iter_search_results,
+    get_search_results,
+    set_search_jobs,
+    wait_for_job,
+)
+from sekripgabut.helpers import range_planner
+from sekripgabut.helpers.checkpoint import (
+    DEFAULT_CHECKPOINT_FILE,
+    CheckpointStore,
+)
+from sekripgabut.helpers.closed_index import ClosedEventIndex
+from sekripgabut.helpers.es_helpers import (
+    DEFAULT_MAX_SEARCH_JOBS,
+    UNCLOSED_NOTABLE_QUERY,
+    range_output_file,
+)
+from sekripgabut.splunk_ops.search import RESULTS_JSON_COLS, SearchJobFailed
+from sekripgabut.utils.gabutils import (
+    OUTPUT_JSON,
+    generate_daily_ranges,
+    generate_weekly_ranges,
+    write_pages_to_file,
+)
+
+
+# Defaults
+DEFAULT_MAX_IN_FLIGHT = 8
+MAX_RECHECKS = 3
+# Result pages buffered ahead of the dump file writer
+WRITE_QUEUE_SIZE = 2
+
+_WRITE_DONE = object()
+
+FIRST_NOTABLE_QUERY = "| tstats earliest(_time) AS _time WHERE index=notable"
+UNCLOSED_NOTABLE_V2_QUERY = """
+    search `notable`
+    | search (NOT `suppression` AND NOT status=5)
+    """
+
+
+async def find_first_notable_time(client, earliest_time="",
+                                  latest_time="now"):
+    """Find the earliest notable event time, or None if there is none."""
+    sid = await set_search_jobs(
+        client, FIRST_NOTABLE_QUERY,
+        earliest_time=earliest_time, latest_time=latest_time)
+    await wait_for_job(client, sid)
+    results = await get_search_results(client, sid)
+    return results[0]["_time"] if results else None
+
+
+async def pemutihan_async(base_url, token, earliest_time, latest_time,
+                          batch_size=3000,
+                          max_search_jobs=DEFAULT_MAX_SEARCH_JOBS,
+                          max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                          job_timeout=None,
+                          target_events=None,
+                          prescan=False,
+                          rate_limiter=None,
+                          checkpoint=None,
+                          resume=False,
+                          closed_index=None):
+    """
+    Close notable events in daily ranges from a single event loop.
+
+    Up to {max_search_jobs} daily searches run at once, and up to
+    {max_in_flight} `notable_update` batches are sent at once across all
+    ranges.
+
+    Ranges run concurrently, so the checkpoint records whole ranges
+    only: a resumed run skips finished ranges and searches unfinished
+    ones again, without the results offset of `pemutihan_v2`.
+
+    Like `pemutihan_v2`, a failed `notable_update` batch stops the run:
+    its range and the ranges not started yet are left unfinished, and
+    the summary has "stopped" set.
+
+    Arguments:
+        base_url (str): Base URL of the Splunk instance.
+        token (str): Bearer token for authentication.
+        earliest_time (str): Start time, default to the first notable.
+        latest_time (str): End time for processing notable events.
+        batch_size (int): Event IDs per results page and update batch.
+        max_search_jobs (int): Concurrent search jobs.
+        max_in_flight (int): Concurrent `notable_update` batches.
+        job_timeout (float): Max seconds to wait for each search job.
+        target_events (int): Plan ranges of about this many notable events
+            instead of daily ranges.
+        prescan (bool): Skip ranges without unclosed notable events, from
+            a single daily count search.
+        rate_limiter (TokenBucket): Limit of `notable_update` requests,
+            awaited without blocking the event loop.
+        checkpoint (str): Checkpoint file path to record finished ranges.
+        resume (bool): Skip ranges finished in {checkpoint}.
+        closed_index (str): Closed event index file path. Event IDs closed
+            before are not sent again.
+
+    Returns:
+        dict -- Merged summary of every range, "ranges" counts the
+        finished ones. None if no start time.
+    """
+    async with AsyncSplunkClient(
+            base_url, token,
+            limit=max_search_jobs + max_in_flight) as client:
+        start_date = earliest_time
+        if not start_date:
+            start_date = await find_first_notable_time(client)
+            if not start_date:
+                logging.warning(
+                    "No notable event found on this instance.")
+                return None
+
+        dates = await _plan_ranges(
+            base_url, token, start_date, latest_time, target_events)
+        if dates is None:
+            dates = generate_daily_ranges(start_date, latest_time or "now")
+            logging.info(f"Generated {len(dates)} daily date ranges.")
+        if prescan:
+            dates = await asyncio.to_thread(
+                range_planner.prescan_ranges, base_url, token, dates,
+                start_date, latest_time or "now")
+
+        store = None
+        if checkpoint or resume:
+            store = CheckpointStore(checkpoint or DEFAULT_CHECKPOINT_FILE)
+        if resume:
+            pending = [
+                date for date in dates
+                if not store.is_done(date["start"], date["end"])
+            ]
+            if len(pending) < len(dates):
+                logging.info(
+                    f"Resuming: skipping {len(dates) - len(pending)} "
+                    f"range(s) already done.")
+            dates = pending
+        index = ClosedEventIndex(closed_index) if closed_index else None
+
+        job_slots = asyncio.Semaphore(max(1, max_search_jobs))
+        update_slots = asyncio.Semaphore(max(1, max_in_flight))
+        stop = asyncio.Event()
+
+        try:
+            results = await asyncio.gather(*(
+                _close_range(client, date, batch_size, job_slots,
+                             update_slots, job_timeout,
+                             rate_limiter=rate_limiter, store=store,
+                             index=index, stop=stop)
+                for date in dates
+            ), return_exceptions=True)
+        finally:
+            if store:
+                store.close()
+            if index:
+                index.close()
+
+    summary = {
+        "ranges": 0,
+        "failed_ranges": 0,
+        "stopped_ranges": 0,
+        "success_count": 0,
+        "failure_count": 0,
+        "processed": 0,
+        "skipped": 0,
+        "stopped": False,
+    }
+    for date, result in zip(dates, results):
+        if isinstance(result, BaseException):
+            logging.error(
+                f"Failed to process {date['start']} -- {date['end']}: "
+                f"{result}")
+            summary["failed_ranges"] += 1
+            # A failed search job leaves its range pending, like v2
+            if not isinstance(result, SearchJobFailed):
+                summary["stopped"] = True
+            continue
+        for key in ("success_count", "failure_count", "processed",
+                    "skipped"):
+            summary[key] += result[key]
+        if result["done"]:
+            summary["ranges"] += 1
+        else:
+            summary["stopped_ranges"] += 1
+            summary["stopped"] = True
+
+    logging.info(f"Async pemutihan summary: {summary}")
+    if summary["stopped_ranges"]:
+        logging.error(
+            f"{summary['stopped_ranges']} range(s) were not finished and "
+            f"are not marked done.")
+    return summary
+
+
+async def _close_range(client, date, batch_size, job_slots, update_slots,
+                       job_timeout=None, rate_limiter=None, store=None,
+                       index=None, stop=None):
+    """
+    Close unclosed notable events of a single {date} range.
+
+    The range is done, and marked done in {store}, only when every batch
+    closed and the last search had nothing left. Otherwise it is left
+    running in {store} and {stop} is set, so the other ranges stop too.
+
+    Returns:
+        dict -- Counts of the range, "done" tells whether it finished.
+    """
+    earliest_time = date["start"]
+    latest_time = date["end"]
+    summary = {
+        "success_count": 0, "failure_count": 0, "processed": 0,
+        "skipped": 0, "done": False,
+    }
+
+    async with job_slots:
+        for _ in range(MAX_RECHECKS):
+            if stop is not None and stop.is_set():
+                break
+            sid = await set_search_jobs(
+                client, UNCLOSED_NOTABLE_V2_QUERY,
+                earliest_time=earliest_time,
+                latest_time=latest_time,
+                adhoc_search_level="smart",
+            )
+            if store:
+                await asyncio.to_thread(
+                    store.start_range, earliest_time, latest_time, sid,
+                    summary["success_count"], summary["failure_count"],
+                    summary["processed"])
+            job_status, waited = await wait_for_job(
+                client, sid, timeout=job_timeout)
+            event_count = job_status.event_count
+            logging.info(
+                f"{earliest_time} -- {latest_time}: eventCount="
+                f"{event_count}, waited={waited:.2f}s")
+            if not event_count:
+                summary["done"] = True
+                break
+
+            pending = set()
+            processed = 0
+            async for results in iter_search_results(
+                    client, sid, page_size=batch_size,
+                    fields=["event_id"], output_mode=RESULTS_JSON_COLS,
+                    columns=True):
+                event_ids = [
+                    event_id for event_id in results.get("event_id") or []
+                    if event_id is not None
+                ]
+                if not event_ids:
+                    break
+                processed += len(event_ids)
+                # The next page is read once a batch slot is free, so at
+                # most max_in_flight pages are held across all ranges
+                await update_slots.acquire()
+                pending.add(asyncio.create_task(
+                    _close_batch(client, event_ids, update_slots,
+                                 rate_limiter, index)))
+                for task in [task for task in pending if task.done()]:
+                    pending.discard(task)
+                    _add_batch_result(summary, task.result())
+                if summary["failure_count"] or stop is not None \
+                        and stop.is_set():
+                    # Stop taking new pages after a failed batch
+                    break
+
+            for result in await asyncio.gather(*pending):
+                _add_batch_result(summary, result)
+            summary["processed"] += processed
+
+            if summary["failure_count"] or stop is not None \
+                    and stop.is_set():
+                break
+            if processed >= event_count:
+                summary["done"] = True
+                break
+            logging.info(
+                f"Rechecking for remaining notable events in "
+                f"{earliest_time} -- {latest_time}.")
+
+    if not summary["done"]:
+        stopped = stop is not None and stop.is_set()
+        if stopped and not summary["processed"]:
+            logging.info(
+                f"Skipping {earliest_time} -- {latest_time}, the run "
+                f"stopped.")
+            return summary
+        if summary["failure_count"]:
+            reason = (f"{summary['failure_count']} notable events failed "
+                      f"to close")
+        elif stopped:
+            reason = "the run stopped"
+        else:
+            reason = f"notable events left after {MAX_RECHECKS} searches"
+        logging.error(
+            f"Stopped closing {earliest_time} -- {latest_time}, {reason}. "
+            f"It is not marked done.")
+        if stop is not None:
+            stop.set()
+    elif store:
+        await asyncio.to_thread(
+            store.mark_done, earliest_time, latest_time,
+            summary["success_count"], summary["failure_count"],
+            summary["processed"])
+    logging.info(
+        f"Time range: {earliest_time} -- {latest_time}, "
+        f"closed: {summary['success_count']}, "
+        f"failed: {summary['failure_count']}, "
+        f"skipped: {summary['skipped']}")
+    return summary
+
+
+async def _close_batch(client, event_ids, update_slots, rate_limiter=None,
+                       index=None):
+    """
+    Close a batch of event IDs, in an {update_slots} slot the caller
+    acquired. The slot is released when the batch is done.
+
+    Returns:
+        tuple -- (success_count, failure_count, skipped), skipped are
+        event IDs already in the closed {index}.
+    """
+    try:
+        skipped = 0
+        if index is not None:
+            page_size = len(event_ids)
+            event_ids = await asyncio.to_thread(index.filter_new, event_ids)
+            skipped = page_size - len(event_ids)
+            if not event_ids:
+                return 0, 0, skipped
+
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async()
+        try:
+            results = await update_notable_event(
+                client, status=5, ruleUIDs=event_ids)
+        except Exception as e:
+            logging.error(
+                f"Failed to close batch of {len(event_ids)} notable "
+                f"events: {e}")
+            return 0, len(event_ids), skipped
+
+        failure_count = results.get("failure_count") or 0
+        if index is not None and not failure_count:
+            await asyncio.to_thread(index.add, event_ids)
+        return (results.get("success_count") or 0, failure_count, skipped)
+    finally:
+        update_slots.release()
+
+
+def _add_batch_result(summary, result):
+    success_count, failure_count, skipped = result
+    summary["success_count"] += success_count
+    summary["failure_count"] += failure_count
+    summary["skipped"] += skipped
+
+
+async def fetch_unclosed_notable_to_file_async(
+        base_url, token, earliest_time=None, latest_time="now",
+        output_dir="unclosed-notables",
+        max_search_jobs=DEFAULT_MAX_SEARCH_JOBS,
+        output_format=OUTPUT_JSON,
+        compression=None,
+        target_events=None):
+    """
+    Fetch un-closed notable events in weekly ranges to JSON files, with
+    up to {max_search_jobs} weekly searches running at once.
+
+    Async equivalent of `es_helpers.fetch_unclosed_notable_to_file`.
+
+    Returns:
+        bool: True if the process completes successfully, False otherwise.
+    """
+    try:
+        async with AsyncSplunkClient(
+                base_url, token, limit=max_search_jobs * 2) as client:
+            start_date = earliest_time
+            if not start_date:
+                start_date = await find_first_notable_time(client)
+                if not start_date:
+                    raise ValueError("Earliest time value is empty")
+
+            if os.path.exists(output_dir):
+                logging.info(f"{output_dir} exists. Overwrite.")
+                shutil.rmtree(output_dir)
+            os.makedirs(output_dir, exist_ok=True)
+
+            dates = await _plan_ranges(
+                base_url, token, start_date, latest_time, target_events)
+            if dates is None:
+                dates = generate_weekly_ranges(
+                    start_date, latest_time or "now")
+                logging.info(f"Generated {len(dates)} weekly date ranges.")
+
+            job_slots = asyncio.Semaphore(max(1, max_search_jobs))
+            await asyncio.gather(*(
+                _fetch_range_to_file(client, date, output_dir, job_slots,
+                                     output_format, compression)
+                for date in dates
+            ))
+        logging.info(f"All files saved to: {output_dir}")
+        return True
+    except Exception as e:
+        logging.critical(f"Failed to retrieve un-closed notable events: {e}")
+        return False
+
+
+async def _fetch_range_to_file(client, date, output_dir, job_slots,
+                               output_format=OUTPUT_JSON, compression=None):
+    earliest = date["start"]
+    latest = date["end"]
+    output_file = range_output_file(
+        output_dir, date, output_format, compression)
+    try:
+        async with job_slots:
+            sid = await set_search_jobs(
+                client, UNCLOSED_NOTABLE_QUERY,
+                earliest_time=earliest, latest_time=latest)
+            await wait_for_job(client, sid)
+            written = await _write_pages_to_file_async(
+                iter_search_results(client, sid), output_file,
+                output_format, compression)
+        if written:
+            logging.info(f"Result successfully saved to: {output_file}")
+            return True
+        logging.warning(
+            f"Failed to write results for range {earliest} to {latest}.")
+    except Exception as e:
+        logging.error(f"Error processing range {earliest} to {latest}: {e}")
+    return False
+
+
+async def _write_pages_to_file_async(pages, file_path,
+                                     output_format=OUTPUT_JSON,
+                                     compression=None,
+                                     queue_size=WRITE_QUEUE_SIZE):
+    """
+    Write the async iterator {pages} with `write_pages_to_file` from a
+    worker thread, as the pages arrive.
+
+    At most {queue_size} pages wait for the writer, so a range is never
+    held in memory whole. If reading {pages} fails, the partial file is
+    removed and the error is raised.
+
+    Returns:
+        bool: True if the file was written successfully, False otherwise.
+    """
+    loop = asyncio.get_running_loop()
+    buffer = asyncio.Queue(maxsize=max(1, queue_size))
+
+    def iter_buffer():
+        while True:
+            page = asyncio.run_coroutine_threadsafe(
+                buffer.get(), loop).result()
+            if page is _WRITE_DONE:
+                return
+            if isinstance(page, Exception):
+                # The writer drops the partial file
+                raise page
+            yield page
+
+    writer = asyncio.ensure_future(asyncio.to_thread(
+        write_pages_to_file, iter_buffer(), file_path, output_format,
+        compression))
+
+    async def put(item):
+        # False if the writer gave up, e.g. on a full disk
+        putter = asyncio.ensure_future(buffer.put(item))
+        await asyncio.wait(
+            {putter, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not putter.done():
+            putter.cancel()
+            return False
+        return True
+
+    try:
+        async for page in pages:
+            if not await put(page):
+                break
+    except BaseException as e:
+        await put(RuntimeError(f"Failed to read the results: {e!r}"))
+        await writer
+        raise
+    await put(_WRITE_DONE)
+    return await writer
+
+
+async def _plan_ranges(base_url, token, start_date, latest_time,
+                       target_events=None):
+    """Planned ranges, None when not planning or the count failed."""
+    if not target_events:
+        return None
+    # A single counting search, the blocking client is fine here
+    return await asyncio.to_thread(
+        range_planner.plan_ranges, base_url, token, start_date,
+        latest_time or "now", target_events=target_events)
+
+
+def run_pemutihan_async(*args, **kwargs):
+    """Run `pemutihan_async` on a new event loop."""
+    return asyncio.run(pemutihan_async(*args, **kwargs))
+
+
+def run_fetch_unclosed_notable_to_file_async(*args, **kwargs):
+    """Run `fetch_unclosed_notable_to_file_async` on a new event loop."""
+    return asyncio.run(fetch_unclosed_notable_to_file_async(*args, **kwargs))
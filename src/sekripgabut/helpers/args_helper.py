@@ -1,4 +1,5 @@
 import argparse
+import sys
 
 
 def add_global_arguments(parser):
@@ -52,6 +53,93 @@ def add_es_arguments(parser):
         "--path",
         help="Output file or directory"
     )
+    add_output_format_arguments(parser)
+    add_parallel_search_arguments(parser)
+    add_metrics_arguments(parser)
+    add_target_arguments(parser)
+
+
+def add_output_format_arguments(parser):
+    """Add unclosed-notable dump format arguments."""
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=("json", "ndjson"),
+        default="json",
+        help=("Dump file format, 'ndjson' appends rows as they arrive. "
+              "Default to json")
+    )
+    parser.add_argument(
+        "--compress",
+        dest="compression",
+        choices=("gzip", "zstd"),
+        help="Compress ndjson dump files. zstd requires zstandard"
+    )
+
+
+def add_metrics_arguments(parser):
+    """Add run metrics export arguments."""
+    parser.add_argument(
+        "--metrics-json",
+        help=("Write a JSON summary of latencies, bytes, throughput and "
+              "retries to this file at the end of the run")
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        help=("Write the run metrics to this Prometheus textfile "
+              "(node_exporter textfile collector)")
+    )
+
+
+def add_parallel_search_arguments(parser):
+    """Add concurrent range search arguments."""
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the range sweep on the asyncio client (requires aiohttp)"
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Number of time ranges searched at once. Default to 1"
+    )
+    parser.add_argument(
+        "--max-search-jobs",
+        type=int,
+        help=("Max concurrent search jobs. "
+              "Default to [Search] max_concurrent_jobs in config or 4")
+    )
+    parser.add_argument(
+        "--search-mode",
+        choices=("job", "export"),
+        default="job",
+        help=("'job' paginates search job results, 'export' streams them "
+              "in a single request. Default to job")
+    )
+    parser.add_argument(
+        "--target-events",
+        type=int,
+        help=("Plan ranges of about this many notable events from hourly "
+              "counts instead of fixed weekly/daily ranges. "
+              "Default to [Search] target_events in config or off")
+    )
+
+
+def add_target_arguments(parser):
+    """Add multi-instance fan-out arguments."""
+    parser.add_argument(
+        "--targets",
+        help=("Comma separated [Target:<name>] sections of the config to "
+              "run against at once, or 'all'. Default to [Splunk] only")
+    )
+    parser.add_argument(
+        "--max-targets",
+        type=int,
+        help=("Targets run at once. "
+              "Default to [Fanout] max_targets in config or every target")
+    )
 
 
 def add_splunk_arguments(parser):
@@ -70,6 +158,7 @@ def add_splunk_arguments(parser):
         "--config",
         help="Load Splunk config.ini file"
     )
+    add_target_arguments(parser)
 
 
 def add_search_arguments(parser):
@@ -127,10 +216,92 @@ def add_pemutihan_arguments(parser):
         "--latest",
         help="End time to search"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=("Concurrent notable_update batches. "
+              "Default to [Notable] max_in_flight in config or 2")
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help=("Max notable_update requests per second. "
+              "Default to [Notable] rate_per_second in config or no limit")
+    )
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        help="Max seconds to wait for each v2 search job. Default to no limit"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help=("Checkpoint file to record v2 progress to. "
+              "Default to pemutihan.checkpoint.db when --resume is used")
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume v2 run, skip ranges already done in the checkpoint"
+    )
+    parser.add_argument(
+        "--closed-index",
+        help=("Index file of event_id already closed, those are not sent "
+              "to notable_update again")
+    )
+    parser.add_argument(
+        "--adaptive-batch",
+        action="store_true",
+        help=("Size notable_update batches from measured latency and "
+              "errors instead of a fixed size")
+    )
+    parser.add_argument(
+        "--prescan",
+        action="store_true",
+        help=("Count unclosed notables per day in one search first, v2 "
+              "skips days without any")
+    )
+    parser.add_argument(
+        "--by-sid",
+        action="store_true",
+        help=("Close each v2 range server-side by searchID, fall back to "
+              "event_id when notables are left")
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        help=("Processes parsing event_id files in parallel, duplicates "
+              "within a file are dropped. Default to [Notable] "
+              "parse_workers in config or 1")
+    )
+    parser.add_argument(
+        "--dedup-all",
+        action="store_true",
+        help=("Parse every event_id file before closing any, to drop "
+              "duplicates across files too")
+    )
+    add_output_format_arguments(parser)
+    add_parallel_search_arguments(parser)
+    add_metrics_arguments(parser)
+    add_target_arguments(parser)
+
+
+def get_args(argv=None, **kwargs):
+    """
+    Build the arguments parsers and parse {argv}.
 
+    Every command is listed, but only the chosen one is imported to add
+    its arguments, and plugin commands are looked up only when the
+    command is not a built-in one.
+
+    Returns:
+        tuple -- (args, command), command is the chosen command module or
+        None.
+    """
+    from sekripgabut import commands
+
+    if argv is None:
+        argv = sys.argv[1:]
 
-def get_args(**kwargs):
-    """Build the arguments parsers"""
     parser = argparse.ArgumentParser(
         description="Swiss army tools hasil gabut yang mungkin saja useless",
         **kwargs,
@@ -142,42 +313,18 @@ def get_args(**kwargs):
     # Define command subparser
     subparsers = parser.add_subparsers(dest="command", required=False)
 
-    # Define 'es' command
-    es_parser = subparsers.add_parser(
-        "es",
-        help="Collection of Splunk Enterprise Security operations"
-    )
-
-    # Pemutihan cuy
-    pemutihan_parser = subparsers.add_parser(
-        "pemutihan",
-        help="Bersih-bersih..."
-    )
-
-    splunk_parser = subparsers.add_parser(
-        "splunk",
-        help="Collection of Splunk Enterprise operations"
-    )
-
-    # Add 'es' arguments
-    add_es_arguments(es_parser)
-
-    # Add 'pemutihan' arguments
-    add_pemutihan_arguments(pemutihan_parser)
-
-    # Add 'splunk' arguments
-    add_splunk_arguments(splunk_parser)
-
-    splunk_subparsers = splunk_parser.add_subparsers(
-        dest="subcommand", required=False
-    )
-    # Define 'splunk search' subcommand
-    search_parser = splunk_subparsers.add_parser(
-        "search",
-        help="Collection of splunk search endpoints operations"
-    )
+    name = commands.find_command_name(argv, commands.BUILTIN_COMMANDS)
+    available = commands.find_commands(include_plugins=name is None)
+    if name is None:
+        name = commands.find_command_name(argv, available)
 
-    # Add 'splunk search' arguments
-    add_search_arguments(search_parser)
+    command = None
+    for command_name, (target, help_text) in available.items():
+        if command_name != name:
+            subparsers.add_parser(command_name, help=help_text)
+            continue
+        command = commands.load_command(target)
+        command.add_arguments(subparsers.add_parser(
+            command_name, help=getattr(command, "HELP", help_text)))
 
-    return parser.parse_args()
+    return parser.parse_args(argv), command
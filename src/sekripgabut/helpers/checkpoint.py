@@ -0,0 +1,102 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+
+DEFAULT_CHECKPOINT_FILE = "pemutihan.checkpoint.db"
+
+# Range status
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+
+
+class CheckpointStore:
+    """
+    Persistent progress of a pemutihan run, stored in a local SQLite file.
+
+    Each time range is recorded with its search job ID, the last committed
+    results offset and the closed/failed/processed counts, so a resumed
+    run can skip finished ranges and continue unfinished ones.
+
+    Arguments:
+        path -- SQLite file path.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ranges (
+                    earliest TEXT NOT NULL,
+                    latest TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    sid TEXT,
+                    "offset" INTEGER NOT NULL DEFAULT 0,
+                    closed INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    processed INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (earliest, latest)
+                )
+                """
+            )
+        logging.info(f"Checkpoint store: {path}")
+
+    def get(self, earliest, latest):
+        """
+        Get the checkpoint of a time range.
+
+        Returns:
+            dict -- Range checkpoint, or None if the range is not recorded.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM ranges WHERE earliest = ? AND latest = ?",
+                (earliest, latest),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_done(self, earliest, latest):
+        checkpoint = self.get(earliest, latest)
+        return bool(checkpoint) and checkpoint["status"] == STATUS_DONE
+
+    def start_range(self, earliest, latest, sid, closed=0, failed=0,
+                    processed=0):
+        """Record a search job dispatched for a time range."""
+        self._save(earliest, latest, STATUS_RUNNING, sid, 0,
+                   closed, failed, processed)
+
+    def commit_offset(self, earliest, latest, sid, offset, closed, failed,
+                      processed):
+        """Record results up to {offset} of the {sid} job as processed."""
+        self._save(earliest, latest, STATUS_RUNNING, sid, offset,
+                   closed, failed, processed)
+
+    def mark_done(self, earliest, latest, closed, failed, processed):
+        """Record a time range as finished."""
+        self._save(earliest, latest, STATUS_DONE, None, 0,
+                   closed, failed, processed)
+
+    def _save(self, earliest, latest, status, sid, offset, closed, failed,
+              processed):
+        updated_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO ranges
+                (earliest, latest, status, sid, "offset", closed, failed,
+                 processed, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (earliest, latest, status, sid, offset, closed, failed,
+                 processed, updated_at),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
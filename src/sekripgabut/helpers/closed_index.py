@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import math
+import sqlite3
+import threading
+
+
+DEFAULT_CLOSED_INDEX_FILE = "closed-notables.db"
+DEFAULT_CAPACITY = 10_000_000
+DEFAULT_ERROR_RATE = 0.01
+
+# SQLite max host parameters per statement is 999 on older builds
+_QUERY_CHUNK = 900
+
+
+def event_id_digest(event_id):
+    """64-bit signed digest of an event ID, the index key."""
+    digest = hashlib.blake2b(event_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class BloomFilter:
+    """
+    Bloom filter over 64-bit digests, used to answer "never seen" without
+    touching the on-disk index.
+
+    Arguments:
+        capacity -- Expected number of items.
+        error_rate -- Target false positive rate.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY,
+                 error_rate=DEFAULT_ERROR_RATE):
+        size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.size = max(8, size)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing from the two 32-bit halves of the digest
+        digest &= 0xFFFFFFFFFFFFFFFF
+        h1 = digest & 0xFFFFFFFF
+        h2 = (digest >> 32) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(digest)
+        )
+
+
+class ClosedEventIndex:
+    """
+    On-disk index of event IDs already closed successfully.
+
+    Event IDs are stored as 64-bit digests in a SQLite file, fronted by an
+    in-memory Bloom filter, so checking a batch of new IDs rarely hits the
+    disk. Delete the file to forget everything.
+
+    Arguments:
+        path -- SQLite file path.
+        capacity -- Expected number of event IDs, sizes the Bloom filter.
+    """
+
+    def __init__(self, path=DEFAULT_CLOSED_INDEX_FILE,
+                 capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS closed "
+                "(digest INTEGER PRIMARY KEY)"
+            )
+
+        count = self._conn.execute("SELECT COUNT(*) FROM closed").fetchone()[0]
+        self._bloom = BloomFilter(max(capacity, count * 2))
+        for (digest,) in self._conn.execute("SELECT digest FROM closed"):
+            self._bloom.add(digest)
+        logging.info(f"Closed event index: {path} ({count} event IDs)")
+
+    def filter_new(self, event_ids):
+        """
+        Drop event IDs already in the index.
+
+        Arguments:
+            event_ids -- List of event IDs.
+
+        Returns:
+            list -- Event IDs not closed yet, in the original order.
+        """
+        digests = [event_id_digest(event_id) for event_id in event_ids]
+        maybe_closed = list({
+            digest for digest in digests if digest in self._bloom
+        })
+
+        closed = set()
+        with self._lock:
+            for i in range(0, len(maybe_closed), _QUERY_CHUNK):
+                chunk = maybe_closed[i:i + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                closed.update(
+                    digest for (digest,) in self._conn.execute(
+                        f"SELECT digest FROM closed "
+                        f"WHERE digest IN ({placeholders})",
+                        chunk,
+                    )
+                )
+
+        if not closed:
+            return list(event_ids)
+        return [
+            event_id for event_id, digest in zip(event_ids, digests)
+            if digest not in closed
+        ]
+
+    def add(self, event_ids):
+        """Record event IDs as closed."""
+        digests = [event_id_digest(event_id) for event_id in event_ids]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO closed (digest) VALUES (?)",
+                ((digest,) for digest in digests),
+            )
+        for digest in digests:
+            self._bloom.add(digest)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,14 +1,39 @@
 import logging
 import os
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
 from sekripgabut.es_ops import es_api
-from sekripgabut.helpers import splunk_helpers
+from sekripgabut.helpers import range_planner, splunk_helpers
+from sekripgabut.splunk_ops.retry import (
+    RETRY_STATUS_CODES,
+    is_transient_error,
+)
 from sekripgabut.utils.gabutils import (
+    OUTPUT_JSON,
     generate_weekly_ranges,
-    write_to_json_file,
+    output_file_extension,
+    write_pages_to_file,
 )
 
 
+# Max search jobs dispatched at once, keep it under the role's search quota
+DEFAULT_MAX_SEARCH_JOBS = 4
+
+# Adaptive notable_update batch sizes
+ADAPTIVE_INITIAL_BATCH = 3000
+ADAPTIVE_MIN_BATCH = 250
+ADAPTIVE_MAX_BATCH = 20000
+ADAPTIVE_GROWTH = 1.25
+
+UNCLOSED_NOTABLE_QUERY = """
+        search `notable`
+        | search (NOT `suppression` AND status!=5)
+        | table event_id"""
+
+
 def find_first_notable_time(base_url, token,
                             earliest_time="", latest_time="now"):
     """
@@ -55,7 +80,13 @@ def fetch_unclosed_notable_to_file(
         token,
         earliest_time=None,
         latest_time="now",
-        output_dir="unclosed-notables"):
+        output_dir="unclosed-notables",
+        parallel=1,
+        max_search_jobs=DEFAULT_MAX_SEARCH_JOBS,
+        search_mode=splunk_helpers.SEARCH_MODE_JOB,
+        output_format=OUTPUT_JSON,
+        compression=None,
+        target_events=None):
     """Get all un-closed notable events since the {earliest_time}
     till the {latest_time}
 
@@ -68,6 +99,16 @@ def fetch_unclosed_notable_to_file(
     latest_time -- Search end time, Default: now()
     output_dir -- Output directory to write the output JSON file to, this will
     rewrite if the directory exists.
+    parallel -- Weekly ranges searched at once. Default: 1 (sequential).
+    max_search_jobs -- Upper limit of concurrent search jobs, whatever the
+    {parallel} value is. Default: 4.
+    search_mode -- "job" to paginate search job results, "export" to stream
+    them from the export endpoint. Default: "job".
+    output_format -- "json" array files or "ndjson" files appended as the
+    pages arrive. Default: "json".
+    compression -- NDJSON compression, None, "gzip" or "zstd".
+    target_events -- Plan ranges of about this many notable events from
+    hourly counts instead of weekly ranges. Default: None (weekly).
 
     Returns:
     bool: True if the process completes successfully, False otherwise.
@@ -96,40 +137,41 @@ def fetch_unclosed_notable_to_file(
         os.makedirs(output_dir, exist_ok=True)
         logging.info(f"Output directory is set to: {output_dir}")
 
-        # Generate weekly ranges
-        dates = generate_weekly_ranges(start_date_input, latest_time)
-        logging.info(f"Generated {len(dates)} weekly date ranges.")
-
-        query = """
-        search `notable`
-        | search (NOT `suppression` AND status!=5)
-        | table event_id"""
+        # Plan ranges from notable counts, or generate weekly ranges
+        dates = None
+        if target_events:
+            dates = range_planner.plan_ranges(
+                base_url, token, start_date_input, latest_time,
+                target_events=target_events)
+        if dates is None:
+            dates = generate_weekly_ranges(start_date_input, latest_time)
+            logging.info(f"Generated {len(dates)} weekly date ranges.")
 
         # Search all un-closed notable and write to file
-        for date in dates:
-            # Get notable event_id
-            earliest = date["start"]
-            latest = date["end"]
-            output_file = os.path.join(output_dir,
-                                       f"{earliest[:10]}_{latest[:10]}.json")
-            try:
-                logging.info(
-                    f"Fetching notable events from {earliest} to {latest}.")
-                notable_events = splunk_helpers.splunk_search(
-                    base_url, token, query,
-                    earliest_time=earliest, latest_time=latest)
-
-                # Write results to json
-                if write_to_json_file(notable_events, output_file):
+        workers = max(1, min(parallel or 1, max_search_jobs or 1))
+        if workers == 1:
+            for date in dates:
+                _fetch_range_to_file(
+                    base_url, token, date, output_dir, search_mode,
+                    output_format, compression)
+        else:
+            logging.info(
+                f"Fetching {len(dates)} ranges with {workers} "
+                f"concurrent search jobs.")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        _fetch_range_to_file,
+                        base_url, token, date, output_dir,
+                        search_mode, output_format, compression): date
+                    for date in dates
+                }
+                for done_count, future in enumerate(
+                        as_completed(futures), start=1):
+                    date = futures[future]
                     logging.info(
-                        f"Result successfully saved to: {output_file}")
-                else:
-                    logging.warning(
-                        f"Failed to write results for range"
-                        f"{earliest} to {latest}.")
-            except Exception as e:
-                logging.error(
-                    f"Error processing range {earliest} to {latest}: {e}")
+                        f"Range {date['start']} to {date['end']} finished "
+                        f"({done_count}/{len(dates)}).")
         logging.info(f"All files saved to: {output_dir}")
         return True
     except Exception as e:
@@ -137,7 +179,139 @@ def fetch_unclosed_notable_to_file(
         return False
 
 
-def close_notable_event_by_event_id(base_url, token, event_id, **kwargs):
+def _fetch_range_to_file(base_url, token, date, output_dir,
+                         search_mode=splunk_helpers.SEARCH_MODE_JOB,
+                         output_format=OUTPUT_JSON,
+                         compression=None):
+    """Fetch un-closed notable events of a single {date} range to a file.
+
+    Returns:
+    bool: True if the file is written, False otherwise.
+    """
+    # Get notable event_id
+    earliest = date["start"]
+    latest = date["end"]
+    output_file = range_output_file(
+        output_dir, date, output_format, compression)
+    try:
+        logging.info(
+            f"Fetching notable events from {earliest} to {latest}.")
+        notable_pages = splunk_helpers.iter_splunk_search(
+            base_url, token, UNCLOSED_NOTABLE_QUERY, mode=search_mode,
+            earliest_time=earliest, latest_time=latest)
+
+        # Write results to file as the pages arrive
+        if write_pages_to_file(notable_pages, output_file,
+                               output_format, compression):
+            logging.info(
+                f"Result successfully saved to: {output_file}")
+            return True
+        logging.warning(
+            f"Failed to write results for range"
+            f"{earliest} to {latest}.")
+    except Exception as e:
+        logging.error(
+            f"Error processing range {earliest} to {latest}: {e}")
+    return False
+
+
+def range_output_file(output_dir, date, output_format=OUTPUT_JSON,
+                      compression=None):
+    """Output file path of a {date} range."""
+    extension = output_file_extension(output_format, compression)
+    start = date['start'][:10]
+    end = date['end'][:10]
+    if "count" in date:
+        # Planned ranges may split a day, they need the time too
+        start = _range_file_stamp(date['start'])
+        end = _range_file_stamp(date['end'])
+    return os.path.join(output_dir, f"{start}_{end}{extension}")
+
+
+def _range_file_stamp(value):
+    # Whole-day bounds keep the date only
+    if value[11:19] in ("", "00:00:00", "23:59:59"):
+        return value[:10]
+    return value[:19].replace(":", "")
+
+
+class AdaptiveBatchSizer:
+    """
+    Pick `notable_update` batch sizes from measured throughput.
+
+    The batch grows while events/sec keeps improving, falls back to the
+    best size seen when throughput drops, and is halved on timeout or
+    transient error. Safe to share between worker threads.
+
+    Arguments:
+        initial -- First batch size.
+        min_size -- Smallest batch size.
+        max_size -- Largest batch size.
+        growth -- Batch size multiplier while throughput improves.
+    """
+
+    def __init__(self, initial=ADAPTIVE_INITIAL_BATCH,
+                 min_size=ADAPTIVE_MIN_BATCH,
+                 max_size=ADAPTIVE_MAX_BATCH,
+                 growth=ADAPTIVE_GROWTH):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.growth = growth
+        self.size = max(min_size, min(initial, max_size))
+        self.best_size = self.size
+        self.best_rate = 0.0
+        self.sizes = []
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, batch_size, seconds):
+        """Record a batch of {batch_size} events closed in {seconds}."""
+        rate = batch_size / max(seconds, 1e-6)
+        with self._lock:
+            self.sizes.append(batch_size)
+            if rate >= self.best_rate:
+                self.best_rate = rate
+                self.best_size = batch_size
+                self.size = min(
+                    self.max_size, int(batch_size * self.growth) + 1)
+            else:
+                self.size = self.best_size
+            logging.debug(
+                f"Batch of {batch_size} closed at {rate:.0f} events/s, "
+                f"next batch size: {self.size}")
+
+    def record_failure(self, batch_size, shrink=True):
+        """Record a failed batch, halve the batch size and forget the best
+        rate if {shrink}."""
+        with self._lock:
+            self.failures += 1
+            if not shrink:
+                return
+            self.size = max(self.min_size, batch_size // 2)
+            # Rates from before the failure are out of reach for the
+            # smaller batch, measure again so the size can grow back
+            self.best_size = self.size
+            self.best_rate = 0.0
+            logging.info(
+                f"Batch of {batch_size} failed, next batch size: {self.size}")
+
+    def summary(self):
+        """Chosen batch sizes so far."""
+        with self._lock:
+            return {
+                "current": self.size,
+                "best": self.best_size,
+                "best_rate": round(self.best_rate, 2),
+                "min_used": min(self.sizes) if self.sizes else None,
+                "max_used": max(self.sizes) if self.sizes else None,
+                "batches": len(self.sizes),
+                "failures": self.failures,
+            }
+
+
+def close_notable_event_by_event_id(base_url, token, event_id,
+                                    batch_sizer=None, rate_limiter=None,
+                                    **kwargs):
     """
     Close notable events by their event IDs.
 
@@ -147,17 +321,28 @@ def close_notable_event_by_event_id(base_url, token, event_id, **kwargs):
         event_id -- List of event IDs to be closed.
 
     Keyword arguments:
+        batch_sizer -- `AdaptiveBatchSizer` to split {event_id} into
+        adaptive batches. Default: None (one request).
+        rate_limiter -- `TokenBucket` taken from before each request.
+        Default: None.
         kwargs -- Additional arguments for updating notable events.
 
     Returns:
-        dict -- JSON response from the API.
+        dict -- JSON response from the API. In adaptive mode, the merged
+        success_count and failure_count of every batch, plus batch_sizes.
     """
     if not event_id:
         raise ValueError("Event ID(s) required to close notable events.")
 
+    if batch_sizer is not None:
+        return _close_adaptive(
+            base_url, token, event_id, batch_sizer, rate_limiter, **kwargs)
+
     logging.debug(f"Closing notable events for event IDs: {event_id}")
 
     try:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
         results = es_api.update_notable_event(
             base_url, token, status=5, ruleUIDs=event_id, **kwargs
         )
@@ -170,6 +355,67 @@ def close_notable_event_by_event_id(base_url, token, event_id, **kwargs):
         raise
 
 
+def _close_adaptive(base_url, token, event_ids, batch_sizer,
+                    rate_limiter=None, **kwargs):
+    """Close {event_ids} in batches sized by {batch_sizer}."""
+    success_count = 0
+    failure_count = 0
+    batch_sizes = []
+    messages = []
+
+    position = 0
+    while position < len(event_ids):
+        batch = event_ids[position:position + batch_sizer.size]
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            results = es_api.update_notable_event(
+                base_url, token, status=5, ruleUIDs=batch, **kwargs
+            )
+        except Exception as e:
+            logging.warning(
+                f"Failed to close batch of {len(batch)} notable events: {e}")
+            transient = _is_transient_close_error(e)
+            batch_sizer.record_failure(len(batch), shrink=transient)
+            if transient and len(batch) > batch_sizer.min_size:
+                # Retry the same events with a smaller batch
+                continue
+            # Smaller batches would fail the same way, give up on the rest
+            remaining = len(event_ids) - position
+            logging.error(
+                f"Giving up on the remaining {remaining} notable events.")
+            failure_count += remaining
+            messages.append(str(e))
+            break
+
+        batch_sizer.record_success(len(batch), time.monotonic() - started)
+        batch_sizes.append(len(batch))
+        success_count += results.get("success_count") or 0
+        failure_count += results.get("failure_count") or 0
+        if results.get("message"):
+            messages.append(results["message"])
+        position += len(batch)
+
+    return {
+        "success": not failure_count,
+        "success_count": success_count,
+        "failure_count": failure_count,
+        "message": "; ".join(dict.fromkeys(messages)),
+        "batch_sizes": batch_sizes,
+    }
+
+
+def _is_transient_close_error(error):
+    """Whether {error} is a timeout or transient status a smaller batch
+    may get through."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return (response is not None
+                and response.status_code in RETRY_STATUS_CODES)
+    return is_transient_error(error)
+
+
 def close_notable_event_by_sid(base_url, token, sid, **kwargs):
     """
     Close notable events by their search IDs.
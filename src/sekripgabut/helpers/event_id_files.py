@@ -0,0 +1,268 @@
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sekripgabut.utils.gabutils import (
+    COMPRESSION_GZIP,
+    COMPRESSION_ZSTD,
+    open_ndjson_file,
+)
+from sekripgabut.utils.event_id_store import EventIdStore
+
+
+READ_CHUNK_SIZE = 1 << 16
+
+# NDJSON file extensions and their compression
+NDJSON_EXTENSIONS = {
+    ".ndjson": None,
+    ".ndjson.gz": COMPRESSION_GZIP,
+    ".ndjson.zst": COMPRESSION_ZSTD,
+}
+
+
+def list_event_id_files(path):
+    """
+    List event ID files of a file or directory path.
+
+    Arguments:
+        path -- File or directory path.
+
+    Returns:
+        list -- Sorted file paths.
+    """
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, file_name)
+        for file_name in os.listdir(path)
+        if os.path.isfile(os.path.join(path, file_name))
+    )
+
+
+def iter_event_ids(path):
+    """
+    Lazily iterate event IDs from a file or every file in a directory.
+
+    Both JSON array files and (compressed) NDJSON files are read one row
+    at a time, so memory stays flat whatever the directory size.
+
+    Arguments:
+        path -- File or directory path.
+
+    Yields:
+        str -- Event IDs, rows without `event_id` are skipped.
+    """
+    try:
+        file_paths = list_event_id_files(path)
+    except OSError as e:
+        raise RuntimeError(f"Failed to process directory {path}: {e}")
+
+    for file_path in file_paths:
+        yield from iter_event_ids_from_file(file_path)
+
+
+def iter_event_ids_from_file(file_path):
+    """
+    Lazily iterate event IDs from a JSON array or NDJSON file.
+
+    Arguments:
+        file_path -- Path to the file.
+
+    Yields:
+        str -- Event IDs.
+    """
+    try:
+        for row in _iter_rows(file_path):
+            if isinstance(row, dict) and "event_id" in row:
+                yield row["event_id"]
+    except (OSError, IOError) as e:
+        raise RuntimeError(f"Failed to read file {file_path}: {e}")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON format in file {file_path}: {e}")
+
+
+def iter_event_ids_parallel(path, workers=None):
+    """
+    Parse event ID files in a process pool and iterate their event IDs.
+
+    Each worker parses whole files, drops duplicates within the file and
+    sends back its event IDs packed in an `EventIdStore`. Files are
+    yielded in sorted order as soon as they are parsed, so closing starts
+    with the first file. At most {workers} * 2 files are parsed ahead of
+    the consumer. An event ID found in several files is yielded once per
+    file, use `load_event_ids_parallel` to drop those too.
+
+    Arguments:
+        path -- File or directory path.
+
+    Keyword arguments:
+        workers -- Worker processes. Default: CPU count.
+
+    Yields:
+        str -- Event IDs, unique within each file.
+    """
+    duplicates = 0
+    for file_store, file_duplicates in _iter_file_stores(
+            path, workers, dedup=True):
+        duplicates += file_duplicates
+        yield from file_store
+
+    if duplicates:
+        logging.info(f"Dropped {duplicates} duplicate event IDs.")
+
+
+def load_event_ids_parallel(path, workers=None):
+    """
+    Parse event ID files in a process pool into a deduplicated store.
+
+    Like `iter_event_ids_parallel`, but every file is merged into a single
+    store first and duplicates across files are dropped too. Nothing can
+    be closed before the last file is parsed, and the dedup briefly needs
+    a second copy of the store.
+
+    Arguments:
+        path -- File or directory path.
+
+    Keyword arguments:
+        workers -- Worker processes. Default: CPU count.
+
+    Returns:
+        EventIdStore -- Unique event IDs, sorted by record.
+    """
+    store = EventIdStore()
+    for file_store, _ in _iter_file_stores(path, workers):
+        store.extend(file_store)
+
+    duplicates = store.dedup()
+    if duplicates:
+        logging.info(f"Dropped {duplicates} duplicate event IDs.")
+    logging.info(
+        f"Loaded {len(store)} event IDs "
+        f"({store.nbytes / 1024 / 1024:.1f} MB).")
+    return store
+
+
+def read_event_ids_from_file(file_path, dedup=False):
+    """
+    Read every event ID of a single file, the process pool task.
+
+    Returns:
+        tuple -- (EventIdStore, duplicates dropped), duplicates are only
+        dropped with {dedup}.
+    """
+    store = EventIdStore(iter_event_ids_from_file(file_path))
+    return store, store.dedup() if dedup else 0
+
+
+def _iter_file_stores(path, workers, dedup=False):
+    try:
+        file_paths = list_event_id_files(path)
+    except OSError as e:
+        raise RuntimeError(f"Failed to process directory {path}: {e}")
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    workers = min(workers, len(file_paths)) or 1
+    logging.info(
+        f"Parsing {len(file_paths)} file(s) with {workers} worker(s).")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        file_paths = iter(file_paths)
+        for file_path in islice(file_paths, workers * 2):
+            pending.append(executor.submit(
+                read_event_ids_from_file, file_path, dedup))
+        while pending:
+            result = pending.popleft().result()
+            for file_path in islice(file_paths, 1):
+                pending.append(executor.submit(
+                    read_event_ids_from_file, file_path, dedup))
+            yield result
+
+
+def iter_batches(iterable, batch_size):
+    """
+    Group {iterable} into lists of {batch_size} items.
+
+    Yields:
+        list -- A batch, the last one may be shorter.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_rows(file_path):
+    for extension, compression in NDJSON_EXTENSIONS.items():
+        if file_path.endswith(extension):
+            with open_ndjson_file(file_path, "r", compression) as file:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+            return
+
+    with open(file_path, "r") as file:
+        yield from _iter_json_array(file)
+
+
+def _iter_json_array(file):
+    """Parse the items of a top level JSON array one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_CHUNK_SIZE)
+    position = _skip_whitespace(buffer, 0)
+    eof = not buffer
+
+    if position >= len(buffer) or buffer[position] != "[":
+        # Not an array, e.g. "null" written for a failed search
+        value = json.loads(buffer + file.read()) if buffer.strip() else None
+        if isinstance(value, list):
+            yield from value
+        elif value is not None:
+            logging.warning(f"Unexpected JSON content in {file.name}")
+        return
+    position += 1
+
+    while True:
+        # Skip separators, read more when the buffer runs out
+        while True:
+            position = _skip_whitespace(buffer, position, ",")
+            if position < len(buffer) or eof:
+                break
+            buffer, position, eof = _read_more(file, buffer, position)
+
+        if position >= len(buffer):
+            raise json.JSONDecodeError(
+                "Unterminated array", buffer, position)
+        if buffer[position] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+            if end == len(buffer) and not eof:
+                # The item may continue in the next chunk
+                raise json.JSONDecodeError("Partial item", buffer, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer, position, eof = _read_more(file, buffer, position)
+            continue
+
+        yield item
+        position = end
+
+
+def _read_more(file, buffer, position):
+    chunk = file.read(READ_CHUNK_SIZE)
+    return buffer[position:] + chunk, 0, not chunk
+
+
+def _skip_whitespace(buffer, position, extra=""):
+    while position < len(buffer) and (
+            buffer[position].isspace() or buffer[position] in extra):
+        position += 1
+    return position
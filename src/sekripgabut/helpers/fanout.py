@@ -0,0 +1,236 @@
+"""
+Run a command against several Splunk ES instances at once.
+
+Each target is a `[Target:<name>]` section of the config:
+
+    [Target:es-jkt]
+    base_url = https://es-jkt.example.com:8089
+    token = <token>
+
+    # Optional, overrides [Client], [Search] or [Notable] for this target
+    [Target:es-jkt:Notable]
+    max_in_flight = 2
+
+Targets run in their own threads. The pooled client is keyed by base_url
+and token, so every target gets its own connection pool, retries and
+circuit breaker, and one slow or broken instance does not hold the others.
+"""
+import configparser
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+TARGET_SECTION_PREFIX = "Target:"
+DEFAULT_TARGET = "default"
+
+# Sections a target may override with [Target:<name>:<section>]
+TARGET_OVERRIDE_SECTIONS = ("Client", "Search", "Notable")
+
+# Summary fields added up across targets
+SUMMED_FIELDS = (
+    "ranges", "processed", "success_count", "failure_count", "skipped",
+    "batches", "failed_batches", "failed_ranges", "stopped_ranges",
+)
+
+
+def load_targets(config):
+    """
+    Splunk targets of the config.
+
+    Without any [Target:<name>] section, [Splunk] base_url and [Auth]
+    token are the single "default" target.
+
+    Returns:
+        dict -- Target name to (base_url, token), in config order.
+    """
+    targets = {}
+    for section in config.sections():
+        if not section.startswith(TARGET_SECTION_PREFIX):
+            continue
+        name = section[len(TARGET_SECTION_PREFIX):]
+        if ":" in name:
+            # Override section of a target
+            continue
+        targets[name] = (
+            config.get(section, 'base_url'),
+            config.get(section, 'token'),
+        )
+    if not targets:
+        targets[DEFAULT_TARGET] = (
+            config.get('Splunk', 'base_url'),
+            config.get('Auth', 'token'),
+        )
+    return targets
+
+
+def select_targets(targets, names):
+    """
+    Arguments:
+        targets -- Targets of `load_targets`.
+        names -- Comma separated target names, or "all".
+
+    Returns:
+        dict -- The chosen targets, in config order.
+
+    Raises:
+        ValueError -- A name is not a target of the config.
+    """
+    if names.strip() == "all":
+        return dict(targets)
+    chosen = [name.strip() for name in names.split(",") if name.strip()]
+    unknown = [name for name in chosen if name not in targets]
+    if unknown:
+        raise ValueError(
+            f"Unknown target(s) {', '.join(unknown)}, "
+            f"config has: {', '.join(targets)}")
+    return {name: targets[name] for name in targets if name in chosen}
+
+
+def target_config(config, name, base_url, token):
+    """
+    Config of a single target.
+
+    A copy of {config} with [Splunk] base_url and [Auth] token of the
+    target, and its [Target:<name>:<section>] keys over <section>, so the
+    single instance code reads it as is.
+
+    Returns:
+        configparser.ConfigParser -- The target config.
+    """
+    target = configparser.ConfigParser(interpolation=None)
+    target.read_dict(config)
+    for section, key, value in (
+            ('Splunk', 'base_url', base_url), ('Auth', 'token', token)):
+        if not target.has_section(section):
+            target.add_section(section)
+        target.set(section, key, value)
+
+    for section in TARGET_OVERRIDE_SECTIONS:
+        override = f"{TARGET_SECTION_PREFIX}{name}:{section}"
+        if not config.has_section(override):
+            continue
+        if not target.has_section(section):
+            target.add_section(section)
+        for key, value in config.items(override):
+            target.set(section, key, value)
+    return target
+
+
+def target_path(path, name):
+    """
+    Per target file or directory of {path}.
+
+    Directories get a <name> sub-directory, files get <name> before the
+    extension, e.g. "closed.db" is "closed.es-jkt.db".
+    """
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    if not ext or os.path.isdir(path):
+        return os.path.join(path, name)
+    return f"{root}.{name}{ext}"
+
+
+def run_fanout(targets, task, max_targets=None):
+    """
+    Run {task} against every target concurrently.
+
+    Arguments:
+        targets -- Target name to (base_url, token).
+        task -- Called as task(name, base_url, token) in a worker thread.
+            Its result is failed when it raises, or returns None, False or
+            a dict with "stopped" set.
+
+    Keyword arguments:
+        max_targets -- Targets run at once. Default: every target.
+
+    Returns:
+        dict -- "targets", name to {ok, seconds, result, error}, and
+        "summary", the SUMMED_FIELDS of every dict result added up with
+        the ok and failed target counts.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def run_target(name, base_url, token):
+        started = time.monotonic()
+        result = None
+        error = None
+        try:
+            logging.info(f"Target {name}: started ({base_url})")
+            result = task(name, base_url, token)
+        except Exception as e:
+            error = str(e)
+            logging.error(f"Target {name}: failed: {e}")
+        ok = error is None and _is_ok(result)
+        with lock:
+            results[name] = {
+                "ok": ok,
+                "seconds": round(time.monotonic() - started, 3),
+                "result": result,
+                "error": error,
+            }
+
+    workers = max(1, min(max_targets or len(targets), len(targets)))
+    with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="fanout") as executor:
+        futures = [
+            executor.submit(run_target, name, base_url, token)
+            for name, (base_url, token) in targets.items()
+        ]
+        for future in futures:
+            future.result()
+
+    report = {
+        "targets": {name: results[name] for name in targets},
+        "summary": merge_summaries(
+            [result["result"] for result in results.values()]),
+    }
+    report["summary"]["ok"] = sum(
+        1 for result in results.values() if result["ok"])
+    report["summary"]["failed"] = len(results) - report["summary"]["ok"]
+    log_report(report)
+    return report
+
+
+def merge_summaries(summaries):
+    """SUMMED_FIELDS of every dict in {summaries} added up."""
+    merged = {}
+    for summary in summaries:
+        if not isinstance(summary, dict):
+            continue
+        for key in SUMMED_FIELDS:
+            value = summary.get(key)
+            if isinstance(value, (int, float)) and not isinstance(
+                    value, bool):
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def log_report(report):
+    """Log a line per target and the merged summary."""
+    logging.info("===============================================")
+    for name, result in report["targets"].items():
+        status = "ok" if result["ok"] else "FAILED"
+        detail = merge_summaries([result["result"]])
+        detail = ", ".join(f"{key}: {value}" for key, value in detail.items())
+        if result["error"]:
+            detail = result["error"]
+        logging.info(
+            f"Target {name}: {status} in {result['seconds']:.1f}s"
+            f"{' -- ' + detail if detail else ''}")
+    summary = ", ".join(
+        f"{key}: {value}" for key, value in report["summary"].items())
+    logging.info(f"All targets: {summary}")
+    logging.info("===============================================")
+
+
+def _is_ok(result):
+    if result is None or result is False:
+        return False
+    if isinstance(result, dict) and result.get("stopped"):
+        return False
+    return True
@@ -1,24 +1,55 @@
 import os
-import json
 import logging
-from time import sleep
 
-import jmespath
-import requests
 # import search
-from sekripgabut.helpers import es_helpers
+from sekripgabut.helpers import (
+    es_helpers,
+    pipeline,
+    range_planner,
+    splunk_helpers,
+)
+from sekripgabut.helpers.checkpoint import (
+    DEFAULT_CHECKPOINT_FILE,
+    STATUS_DONE,
+    CheckpointStore,
+)
+from sekripgabut.helpers.closed_index import ClosedEventIndex
+from sekripgabut.helpers.event_id_files import (
+    iter_batches,
+    iter_event_ids,
+    iter_event_ids_parallel,
+    load_event_ids_parallel,
+)
 from sekripgabut.splunk_ops.search import (
+    RESULTS_JSON_COLS,
+    SearchJobFailed,
     get_search_job_by_sid,
     set_search_jobs,
-    get_search_results,
+    iter_search_results,
+    page_length,
+    wait_for_job,
 )
+from sekripgabut.utils import metrics
 from sekripgabut.utils.gabutils import (
+    OUTPUT_JSON,
     generate_daily_ranges,
     generate_weekly_ranges
 )
 
 
-def pemutihan(base_url, token, path, earliest_time, latest_time):
+def pemutihan(base_url, token, path, earliest_time, latest_time,
+              parallel=1,
+              max_search_jobs=es_helpers.DEFAULT_MAX_SEARCH_JOBS,
+              search_mode="job",
+              closed_index=None,
+              adaptive_batch=False,
+              workers=1,
+              rate_limiter=None,
+              output_format=OUTPUT_JSON,
+              compression=None,
+              parse_workers=1,
+              dedup_all=False,
+              target_events=None):
     """
     Clean up unclosed notable events. Fetch notable events based on
     a time range, save them to files in the specified directory,
@@ -30,6 +61,28 @@ def pemutihan(base_url, token, path, earliest_time, latest_time):
         path -- Directory or file path to store and read event data.
         earliest_time -- Start of the time range for fetching events.
         latest_time -- End of the time range for fetching events.
+        parallel -- Weekly ranges searched at once while fetching events.
+        max_search_jobs -- Upper limit of concurrent search jobs.
+        search_mode -- "job" or "export" search to fetch events.
+        closed_index -- Closed event index file path. Event IDs closed
+            before are not sent again.
+        adaptive_batch -- Size `notable_update` batches from measured
+            latency and errors instead of fixed 8000.
+        workers -- Concurrent `notable_update` batches.
+        rate_limiter -- `TokenBucket` limiting `notable_update` requests.
+        output_format -- "json" or "ndjson" files to fetch events to.
+        compression -- "gzip" or "zstd" compression of NDJSON files.
+        parse_workers -- Processes parsing the files. With more than 1,
+            files are parsed in parallel and closed as they are parsed,
+            duplicate event IDs within a file are dropped.
+        dedup_all -- Parse every file before closing any, to drop
+            duplicate event IDs across files too.
+        target_events -- Fetch ranges planned to about this many notable
+            events instead of weekly ranges.
+
+    Returns:
+        dict -- Close summary of `pipeline.close_event_id_pages`, None if
+        fetching or reading the events failed.
     """
     try:
         # Fetch unclosed notable events and save to files
@@ -39,7 +92,13 @@ def pemutihan(base_url, token, path, earliest_time, latest_time):
             token,
             earliest_time=earliest_time,
             latest_time=latest_time,
-            output_dir=path
+            output_dir=path,
+            parallel=parallel,
+            max_search_jobs=max_search_jobs,
+            search_mode=search_mode,
+            output_format=output_format,
+            compression=compression,
+            target_events=target_events,
         )
     except Exception as e:
         logging.error(f"Failed to fetch unclosed notable events: {e}")
@@ -50,44 +109,45 @@ def pemutihan(base_url, token, path, earliest_time, latest_time):
         logging.error(f"Input {path} not found")
         return
 
-    event_ids = []
     try:
-        # Read JSON file from a file or directory
-        if os.path.isfile(path):
-            event_ids = _read_event_ids_from_file(path)
-        else:
-            event_ids = _read_event_ids_from_directory(path)
-
-        # Extract event_id
-        event_ids = [
-            item['event_id'] for item in event_ids if 'event_id' in item
-        ]
-
-        if not event_ids:
-            logging.warning("No valid event IDs found in the input.")
-            return
+        index = ClosedEventIndex(closed_index) if closed_index else None
 
         # Close notable events per batch
         batch_size = 8000
-        for i in range(0, len(event_ids), batch_size):
-            batch = event_ids[i:i + batch_size]
-            logging.info(
-                f"processing batch {i // batch_size + 1}:"
-                f"{len(batch)} notable events..."
-            )
-            try:
-                results = es_helpers.close_notable_event_by_event_id(
-                    base_url,
-                    token,
-                    batch,
-                )
-                logging.info(
-                    f":Batch {i // batch_size + 1} from: {len(event_ids)}"
-                    f"results: {results}")
-            except Exception as e:
-                logging.error(
-                    f"Error processing batch {i // batch_size + 1}"
-                    f"from {len(event_ids)}: {e}")
+        batch_sizer = None
+        if adaptive_batch:
+            batch_sizer = es_helpers.AdaptiveBatchSizer()
+            batch_size = batch_sizer.max_size
+
+        # Event IDs are read lazily from the files, batch by batch, or
+        # all at once into a compact store to drop every duplicate
+        if dedup_all:
+            batches = load_event_ids_parallel(
+                path, parse_workers).batches(batch_size)
+        elif parse_workers and parse_workers > 1:
+            batches = iter_batches(
+                iter_event_ids_parallel(path, parse_workers), batch_size)
+        else:
+            batches = iter_batches(iter_event_ids(path), batch_size)
+        summary = pipeline.close_event_id_pages(
+            base_url, token, batches,
+            workers=workers,
+            stop_on_failure=False,
+            closed_index=index,
+            batch_sizer=batch_sizer,
+            rate_limiter=rate_limiter,
+        )
+        if not summary["processed"]:
+            logging.warning("No valid event IDs found in the input.")
+            return summary
+
+        logging.info(
+            f"Closed {summary['success_count']} of {summary['processed']} "
+            f"notable events, failed: {summary['failure_count']}, "
+            f"skipped: {summary['skipped']}")
+        if batch_sizer:
+            logging.info(f"Adaptive batch sizes: {batch_sizer.summary()}")
+        return summary
     except Exception as e:
         logging.error(f"An error occurred during event processing: {e}")
 
@@ -98,7 +158,17 @@ def pemutihan_v2(
         earliest_time,
         latest_time,
         offset=0,
-        batch_size=3000):
+        batch_size=3000,
+        workers=pipeline.DEFAULT_CLOSE_WORKERS,
+        job_timeout=None,
+        checkpoint=None,
+        resume=False,
+        closed_index=None,
+        adaptive_batch=False,
+        rate_limiter=None,
+        target_events=None,
+        prescan=False,
+        by_sid=False):
     """
     Process and close notable events in a specified time range.
 
@@ -107,6 +177,30 @@ def pemutihan_v2(
         token (str): Bearer token for authentication.
         earliest_time (str): Start time for processing notable events.
         latest_time (str): End time for processing notable events.
+        offset (int): Results offset to start from on the first range.
+        batch_size (int): Event IDs per results page and update batch.
+        workers (int): Concurrent `notable_update` batches.
+        job_timeout (float): Max seconds to wait for each search job.
+        checkpoint (str): Checkpoint file path to record progress to.
+        resume (bool): Skip ranges finished in {checkpoint} and continue
+            the unfinished one from its last committed offset.
+        closed_index (str): Closed event index file path. Event IDs
+            closed before are not sent again.
+        adaptive_batch (bool): Size `notable_update` batches from measured
+            latency and errors, {batch_size} is the first batch size.
+        rate_limiter (TokenBucket): Limit of `notable_update` requests.
+        target_events (int): Plan ranges of about this many notable events
+            from hourly counts instead of daily ranges.
+        prescan (bool): Count unclosed notable events per day in a single
+            search first, and skip ranges without any.
+        by_sid (bool): Close each range server-side with `searchID`, and
+            fall back to closing by event ID when notable events are left.
+
+    Returns:
+        dict -- Report of the run with ranges, failed_ranges,
+        success_count, failure_count, processed and stopped, None if there
+        is no notable event to start from. A range whose search job
+        failed is not marked done, --resume searches it again.
     """
     # TODO:
     # - Check status. dispatchState, isDone?
@@ -131,7 +225,39 @@ def pemutihan_v2(
                 or check your earliest time input.""")
             return
 
-    dates = generate_daily_ranges(start_date, latest_time)
+    dates = None
+    if target_events:
+        dates = range_planner.plan_ranges(
+            base_url, token, start_date, latest_time,
+            target_events=target_events)
+    if dates is None:
+        dates = generate_daily_ranges(start_date, latest_time)
+    if prescan:
+        dates = range_planner.prescan_ranges(
+            base_url, token, dates, start_date, latest_time)
+
+    metrics.set_gauge("ranges_planned", len(dates))
+    report = {
+        "ranges": 0,
+        "failed_ranges": 0,
+        "success_count": 0,
+        "failure_count": 0,
+        "processed": 0,
+        "stopped": False,
+    }
+
+    store = None
+    if checkpoint or resume:
+        store = CheckpointStore(checkpoint or DEFAULT_CHECKPOINT_FILE)
+
+    index = ClosedEventIndex(closed_index) if closed_index else None
+
+    # Adaptive batches are split from results pages of the max batch size
+    batch_sizer = None
+    page_size = batch_size
+    if adaptive_batch:
+        batch_sizer = es_helpers.AdaptiveBatchSizer(initial=batch_size)
+        page_size = batch_sizer.max_size
 
     query = """
     search `notable`
@@ -142,15 +268,29 @@ def pemutihan_v2(
         earliest_time = date["start"]
         latest_time = date["end"]
 
-        dispatch_state = None
         event_count = None
         # For reports
         successes_count = 0
-        success_count = 0
         failures_count = 0
-        failure_count = 0
         total_processed = 0
         total_final_proccessed = 0
+        waited_total = 0.0
+        resume_sid = None
+        sid_attempted = False
+
+        if store and resume:
+            saved = store.get(earliest_time, latest_time)
+            if saved and saved["status"] == STATUS_DONE:
+                logging.info(
+                    f"Skipping {earliest_time} -- {latest_time}, "
+                    f"already done.")
+                continue
+            if saved:
+                successes_count = saved["closed"]
+                failures_count = saved["failed"]
+                total_final_proccessed = saved["processed"]
+                resume_sid = saved["sid"]
+                offset = saved["offset"]
 
         while True:
             # Determine the time if not provided
@@ -159,162 +299,160 @@ def pemutihan_v2(
                 f"'Pemutihan' will start from {earliest_time} "
                 f"till {latest_time}.")
 
-            try:
-                # Start the search job
-                logging.debug("Starting search jobs...")
-                sid = set_search_jobs(
-                    base_url=base_url,
-                    token=token,
-                    query=query,
-                    earliest_time=earliest_time,
-                    latest_time=latest_time,
-                    adhoc_search_level="smart",
-                )
-                logging.info(f"Jobs {sid} is Done.")
-            except Exception as e:
-                logging.error(f"Failed to set the search jobs: {e}")
-                return
+            if resume_sid and _job_exists(base_url, token, resume_sid):
+                sid = resume_sid
+                logging.info(f"Resuming job {sid} from offset {offset}.")
+            else:
+                if resume_sid:
+                    offset = 0
+                try:
+                    # Start the search job
+                    logging.debug("Starting search jobs...")
+                    sid = set_search_jobs(
+                        base_url=base_url,
+                        token=token,
+                        query=query,
+                        earliest_time=earliest_time,
+                        latest_time=latest_time,
+                        adhoc_search_level="smart",
+                    )
+                    logging.info(f"Jobs {sid} is Done.")
+                except Exception as e:
+                    logging.error(f"Failed to set the search jobs: {e}")
+                    report["stopped"] = True
+                    return report
+                if store:
+                    store.start_range(
+                        earliest_time, latest_time, sid, successes_count,
+                        failures_count, total_final_proccessed)
+            resume_sid = None
 
             # Wait for search jobs to complete
             try:
-                while True:
-                    # Monitoring {sid} search job status isDone.
-                    job_info = get_search_job_by_sid(base_url, token, sid)
-
-                    is_done = jmespath.search(
-                        "entry[0].content.isDone", job_info)
-                    dispatch_state = jmespath.search(
-                        "entry[0].content.dispatchState", job_info)
-                    # event_available_count = jmespath.search(
-                    #     "entry[0].content.eventAvailableCount", job_info)
-                    event_count = jmespath.search(
-                        "entry[0].content.eventCount", job_info)
-                    # result_count = jmespath.search(
-                    #     "entry[0].content.resultCount", job_info)
-
-                    logging.info(
-                        f"Job status: dispatchState={dispatch_state},"
-                        f"eventCount={event_count}, isDone={is_done}"
-                    )
-
-                    if is_done:
-                        break
+                job_status, waited = wait_for_job(
+                    base_url, token, sid, timeout=job_timeout)
+                waited_total += waited
+                event_count = job_status.event_count
 
-                    sleep(3)
+                logging.info(
+                    f"Job status: dispatchState={job_status.dispatch_state},"
+                    f"eventCount={event_count}, "
+                    f"resultCount={job_status.result_count}, "
+                    f"runDuration={job_status.run_duration:.2f}s, "
+                    f"waited={waited:.2f}s"
+                )
 
+            except SearchJobFailed as e:
+                # Not an empty range, leave it pending in the checkpoint
+                logging.error(
+                    f"{e}. Skipping {earliest_time} -- {latest_time}, "
+                    f"it is not marked done.")
+                report["failed_ranges"] += 1
+                metrics.inc("ranges_failed")
+                if store:
+                    # Without the failed SID, --resume dispatches a new job
+                    store.start_range(
+                        earliest_time, latest_time, None, successes_count,
+                        failures_count, total_final_proccessed)
+                offset = 0
+                break
             except Exception as e:
                 logging.error(f"Error while monitoring job {sid}: {e}")
-                return
+                report["stopped"] = True
+                return report
 
+            # Only a job that succeeded can tell the range is empty
             if not event_count or event_count == 0:
-                logging.info("===============================================")
-                logging.info(f"Time range: {earliest_time} -- {latest_time}")
-                logging.info(f"Successfully closed: {successes_count}")
-                logging.info(f"Failed to close: {failures_count}")
-                logging.info(
-                    f"Total processed events: {total_final_proccessed}")
-                logging.info("===============================================")
+                _log_range_report(
+                    earliest_time, latest_time, successes_count,
+                    failures_count, total_final_proccessed, waited_total,
+                    report)
+                if store:
+                    store.mark_done(
+                        earliest_time, latest_time, successes_count,
+                        failures_count, total_final_proccessed)
+                offset = 0
                 break
 
-            # Fetch and update notable event
-            endpoint = f"{base_url}/services/search/jobs/{sid}/results"
-            headers = {"Authorization": f"Bearer {token}"}
-
-            while total_processed < event_count:
-                # Fetch search results
-                payload = {
-                    "output_mode": "json",
-                    "offset": offset,
-                    "count": batch_size,
-                }
-
-                # fetch the results
-                try:
-                    r = requests.get(
-                        endpoint,
-                        headers=headers, params=payload, verify=False)
-                    r.raise_for_status()
-
-                    results = r.json()
-
-                    event_ids = jmespath.search("results[*].event_id", results)
-
-                    # if not isinstance(event_ids, list):
-                    #     logging.error(
-                    #         f"Event IDs content: {event_ids}"
-                    #         f"Event IDs type: {type(event_ids)}"
-                    #     )
-                    #     return
-
-                    if not event_ids:
-                        results_message = jmespath.search("messages", results)
-                        if event_count > 0:
-                            print("======")
-                            print(json.dumps(results, indent=4))
-                            print("======")
-                            break
-                        logging.info(
-                            f"Event IDs not found:"
-                            f"{results_message}"
-                        )
-                        logging.info(
-                            "======================")
-                        logging.info(
-                            f"Time range: {earliest_time} -- {latest_time}")
-                        logging.info(f"Event Count: {event_count}")
-                        logging.info(f"Successfully closed: {success_count}")
-                        logging.info(f"Failed to close: {failure_count}")
-                        logging.info(
-                            f"Total processed events: {total_processed}")
-                        logging.info(
-                            "======================")
-                        break
-
-                    close_results = es_helpers.close_notable_event_by_event_id(
-                        base_url, token, event_ids)
-
-                    if isinstance(close_results, dict):
-                        message = jmespath.search("message", close_results)
-                        success_count = jmespath.search(
-                            "success_count", close_results
-                        )
-                        failure_count = jmespath.search(
-                            "failure_count", close_results
-                        )
-                        success = jmespath.search("success", close_results)
-                        details = jmespath.search("details", close_results)
-
-                        successes_count += success_count
-                        failures_count += failure_count
-                        total_processed += len(event_ids)
-                        logging.info(
-                            f"Success = {success},"
-                            f"Total processed = {total_processed}"
-                        )
-                        logging.info(
-                            f"Current processed notable = "
-                            f"{success_count}/{event_count}"
-                        )
-                        if failure_count:
-                            logging.info(f"Failures count = {failures_count}")
-                            logging.info(f"Success = {success}")
-                            logging.info(f"Message = {message}")
-                            logging.info(f"Details = {details}")
-                            return
-
-                        logging.debug("Batch update success!")
-                    else:
-                        logging.error(f"Failed processing {batch_size} batch.")
-                        break
-
-                    total_final_proccessed += total_processed
-                    offset += batch_size
-
-                except Exception as e:
-                    logging.error(
-                        f"Error processing batch starting at offset {offset}: "
-                        f"{e}")
-                    return
+            if by_sid and not sid_attempted:
+                sid_attempted = True
+                closed, remaining = _close_by_sid(
+                    base_url, token, sid, query, earliest_time, latest_time,
+                    event_count)
+                successes_count += closed
+                total_final_proccessed += closed
+                if remaining == 0:
+                    _log_range_report(
+                        earliest_time, latest_time, successes_count,
+                        failures_count, total_final_proccessed, waited_total,
+                        report)
+                    if store:
+                        store.mark_done(
+                            earliest_time, latest_time, successes_count,
+                            failures_count, total_final_proccessed)
+                    offset = 0
+                    break
+
+                logging.warning(
+                    f"{remaining} notable events left after closing by "
+                    f"searchID, closing by event ID.")
+                if closed:
+                    # Results of {sid} are partly closed, search again
+                    offset = 0
+                    continue
+
+            def commit(summary, sid=sid, start_offset=offset,
+                       closed=successes_count, failed=failures_count,
+                       processed=total_final_proccessed):
+                # Commit only the successfully closed prefix of the results
+                if store and not summary["failed_batches"]:
+                    store.commit_offset(
+                        earliest_time, latest_time, sid,
+                        start_offset + summary["processed"],
+                        closed + summary["success_count"],
+                        failed + summary["failure_count"],
+                        processed + summary["processed"])
+
+            # Fetch and update notable event. Result pages are fetched ahead
+            # while earlier pages are being closed
+            try:
+                pages = iter_search_results(
+                    base_url, token, sid,
+                    page_size=page_size, offset=offset,
+                    fields=["event_id"], output_mode=RESULTS_JSON_COLS,
+                    columns=True)
+
+                summary = pipeline.close_event_id_pages(
+                    base_url, token, _iter_event_id_pages(pages),
+                    workers=workers,
+                    on_batch=commit,
+                    closed_index=index,
+                    batch_sizer=batch_sizer,
+                    rate_limiter=rate_limiter,
+                )
+            except Exception as e:
+                logging.error(
+                    f"Error processing batch starting at offset {offset}: "
+                    f"{e}")
+                report["stopped"] = True
+                return report
+
+            successes_count += summary["success_count"]
+            failures_count += summary["failure_count"]
+            # Results before the start offset were processed earlier
+            total_processed = offset + summary["processed"]
+            total_final_proccessed += summary["processed"]
+
+            if summary["stopped"]:
+                logging.error(
+                    f"Stopped closing {earliest_time} -- {latest_time} "
+                    f"after {summary['failed_batches']} failed batch(es).")
+                _log_range_report(
+                    earliest_time, latest_time, successes_count,
+                    failures_count, total_final_proccessed, waited_total,
+                    report, done=False)
+                report["stopped"] = True
+                return report
 
             if total_processed < event_count:
                 logging.info("=================")
@@ -327,55 +465,106 @@ def pemutihan_v2(
                 )
                 logging.info("=================")
 
-                total_processed = 0
                 offset = 0
                 continue
-            logging.info("===============================================")
-            logging.info(f"Time range: {earliest_time} -- {latest_time}")
-            logging.info(f"Successfully closed: {successes_count}")
-            logging.info(f"Failed to close: {failures_count}")
-            logging.info(
-                f"Total processed events: {total_final_proccessed}")
-            logging.info("===============================================")
+            _log_range_report(
+                earliest_time, latest_time, successes_count,
+                failures_count, total_final_proccessed, waited_total,
+                report)
+            if store:
+                store.mark_done(
+                    earliest_time, latest_time, successes_count,
+                    failures_count, total_final_proccessed)
+            offset = 0
             break
 
+    if batch_sizer:
+        logging.info(f"Adaptive batch sizes: {batch_sizer.summary()}")
+    if report["failed_ranges"]:
+        logging.warning(
+            f"{report['failed_ranges']} range(s) failed their search job "
+            f"and were left pending.")
+    return report
 
-def _read_event_ids_from_file(file_path):
-    """
-    Read event data from a single JSON file.
 
-    Arguments:
-        file_path -- Path to the JSON file.
+def _close_by_sid(base_url, token, sid, query, earliest_time, latest_time,
+                  event_count):
+    """
+    Close every result of {sid} server-side, then count what is left.
 
     Returns:
-        list -- Parsed JSON content.
+        tuple -- (closed, remaining), remaining is None if unknown.
     """
     try:
-        with open(file_path, "r") as file:
-            return json.load(file)
-    except (OSError, IOError) as e:
-        raise RuntimeError(f"Failed to read file {file_path}: {e}")
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON format in file {file_path}: {e}")
+        results = es_helpers.close_notable_event_by_sid(base_url, token, sid)
+        logging.info(
+            f"Closed by searchID {sid}: success = "
+            f"{(results or {}).get('success')}, "
+            f"reported = {(results or {}).get('success_count')}")
+    except Exception as e:
+        logging.error(f"Failed to close notable events by searchID: {e}")
+        return 0, None
+
+    # Verify with a fresh count, the response only tells what was sent
+    results = splunk_helpers.splunk_search(
+        base_url, token, query + "| stats count",
+        earliest_time=earliest_time, latest_time=latest_time)
+    if not results:
+        logging.warning(f"Failed to verify closing by searchID {sid}.")
+        return 0, None
+
+    remaining = int(results[0].get("count") or 0)
+    closed = max(0, event_count - remaining)
+    logging.info(
+        f"Closed by searchID {sid}: {closed} of {event_count}, "
+        f"remaining = {remaining}")
+    return closed, remaining
+
+
+def _job_exists(base_url, token, sid):
+    """Check whether the {sid} search job still exists on the server."""
+    try:
+        get_search_job_by_sid(base_url, token, sid)
+        return True
+    except Exception:
+        logging.info(f"Job {sid} is no longer available.")
+        return False
 
 
-def _read_event_ids_from_directory(directory_path):
+def _iter_event_id_pages(pages):
     """
-    Read event data from all JSON files in a directory.
-
-    Arguments:
-        directory_path -- Path to the directory containing JSON files.
-
-    Returns:
-        list -- Aggregated JSON content from all files.
+    Yield the event IDs of each `event_id` column page until a page has
+    none.
     """
-    event_ids = []
-    try:
-        for file_name in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, file_name)
-            if os.path.isfile(file_path):
-                event_ids.extend(_read_event_ids_from_file(file_path))
-    except Exception as e:
-        raise RuntimeError(
-            f"Failed to process directory {directory_path}: {e}")
-    return event_ids
+    for results in pages:
+        event_ids = [
+            event_id for event_id in results.get("event_id") or []
+            if event_id is not None
+        ]
+        if not event_ids:
+            logging.info(
+                f"Event IDs not found in results page of "
+                f"{page_length(results)} results.")
+            return
+        yield event_ids
+
+
+def _log_range_report(earliest_time, latest_time, successes_count,
+                      failures_count, total_processed, waited=0.0,
+                      report=None, done=True):
+    # Only finished ranges count, a stopped one is left for --resume
+    metrics.inc("ranges_done" if done else "ranges_stopped")
+    if report is not None:
+        if done:
+            report["ranges"] += 1
+        report["success_count"] += successes_count
+        report["failure_count"] += failures_count
+        report["processed"] += total_processed
+    logging.info("===============================================")
+    logging.info(f"Time range: {earliest_time} -- {latest_time}")
+    logging.info(f"Successfully closed: {successes_count}")
+    logging.info(f"Failed to close: {failures_count}")
+    logging.info(
+        f"Total processed events: {total_processed}")
+    logging.info(f"Waiting for search jobs: {waited:.2f}s")
+    logging.info("===============================================")
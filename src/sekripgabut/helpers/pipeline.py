@@ -0,0 +1,159 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sekripgabut.helpers import es_helpers
+from sekripgabut.utils import metrics
+from sekripgabut.utils.gabutils import iter_prefetch
+
+
+# Defaults
+DEFAULT_CLOSE_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 2
+
+
+def new_close_summary():
+    """Empty summary of a close run."""
+    return {
+        "batches": 0,
+        "processed": 0,
+        "success_count": 0,
+        "failure_count": 0,
+        "failed_batches": 0,
+        "skipped": 0,
+        "stopped": False,
+    }
+
+
+def close_event_id_pages(base_url, token, pages,
+                         workers=DEFAULT_CLOSE_WORKERS,
+                         queue_size=DEFAULT_QUEUE_SIZE,
+                         stop_on_failure=True,
+                         on_batch=None,
+                         closed_index=None,
+                         **kwargs):
+    """
+    Close notable events from pages of event IDs with a fetch/close
+    pipeline.
+
+    Pages are read ahead into a bounded queue by a producer thread while
+    up to {workers} `notable_update` batches are in flight, so fetching
+    the next page overlaps with closing the previous ones. When the queue
+    is full the producer waits, and when every worker is busy no more
+    pages are taken from the queue. Batch results are accounted in page
+    order.
+
+    Arguments:
+        base_url -- Splunk instance base URL.
+        token -- Splunk token access.
+        pages -- Iterable of event ID lists, one list per batch.
+
+    Keyword arguments:
+        workers -- Concurrent `notable_update` batches. Default: 2.
+        queue_size -- Pages fetched ahead of the workers. Default: 2.
+        stop_on_failure -- Stop taking new pages after a batch reports
+        failures. Default: True.
+        on_batch -- Callback called with the summary after each batch is
+        accounted, in page order. Default: None.
+        closed_index -- `ClosedEventIndex` of event IDs already closed.
+        Those are dropped from each batch, and batches closed without
+        failures are added to it. Default: None.
+        kwargs -- Additional arguments for updating notable events.
+
+    Returns:
+        dict -- Summary with batches, processed, success_count,
+        failure_count, failed_batches, skipped and stopped.
+    """
+    summary = new_close_summary()
+    workers = max(1, workers)
+    pending = deque()
+
+    def account(batch_number, batch, future, page_size):
+        if future is None:
+            # Every event ID of the page is already closed
+            summary["processed"] += page_size
+            return True
+
+        try:
+            results = future.result()
+        except Exception as e:
+            logging.error(f"Error processing batch {batch_number}: {e}")
+            results = None
+
+        summary["batches"] += 1
+        summary["processed"] += page_size
+
+        if not isinstance(results, dict):
+            logging.error(
+                f"Failed processing batch {batch_number} "
+                f"({len(batch)} notable events).")
+            summary["failure_count"] += len(batch)
+            summary["failed_batches"] += 1
+            return False
+
+        success_count = results.get("success_count") or 0
+        failure_count = results.get("failure_count") or 0
+        summary["success_count"] += success_count
+        summary["failure_count"] += failure_count
+        logging.info(
+            f"Batch {batch_number}: success = {results.get('success')}, "
+            f"closed = {success_count}/{len(batch)}, "
+            f"total processed = {summary['processed']}")
+
+        if failure_count:
+            summary["failed_batches"] += 1
+            logging.info(f"Failures count = {summary['failure_count']}")
+            logging.info(f"Message = {results.get('message')}")
+            logging.info(f"Details = {results.get('details')}")
+            return False
+
+        if closed_index is not None:
+            closed_index.add(batch)
+        return True
+
+    def drain(limit):
+        # Account finished batches in order until {limit} are in flight
+        ok = True
+        while len(pending) > limit:
+            batch_number, batch, future, page_size = pending.popleft()
+            ok = account(batch_number, batch, future, page_size) and ok
+            if on_batch:
+                on_batch(summary)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        page_queue = iter_prefetch(pages, queue_size)
+        try:
+            for batch_number, batch in enumerate(page_queue, start=1):
+                if not batch:
+                    continue
+                page_size = len(batch)
+
+                future = None
+                if closed_index is not None:
+                    batch = closed_index.filter_new(batch)
+                    summary["skipped"] += page_size - len(batch)
+                    metrics.inc("events_skipped", page_size - len(batch))
+                    if page_size != len(batch):
+                        logging.info(
+                            f"Batch {batch_number}: skipping "
+                            f"{page_size - len(batch)} already closed "
+                            f"notable events.")
+                if batch:
+                    future = executor.submit(
+                        es_helpers.close_notable_event_by_event_id,
+                        base_url, token, batch, **kwargs)
+                pending.append((batch_number, batch, future, page_size))
+                metrics.set_gauge("close_queue_depth", len(pending))
+
+                # Back-pressure: wait for the oldest batch when all
+                # workers are busy
+                if not drain(workers - 1) and stop_on_failure:
+                    summary["stopped"] = True
+                    break
+        finally:
+            page_queue.close()
+            if not drain(0) and stop_on_failure:
+                summary["stopped"] = True
+
+    return summary
@@ -0,0 +1,270 @@
+import logging
+import math
+from bisect import bisect_right
+from datetime import timedelta
+
+from sekripgabut.helpers import splunk_helpers
+from sekripgabut.utils.gabutils import parse_date
+
+
+# Defaults
+DEFAULT_TARGET_EVENTS = 50000
+DEFAULT_SPAN = 3600
+# Hot spans are not split below this many seconds
+MIN_SLICE_SECONDS = 60
+
+RANGE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+NOTABLE_COUNT_QUERY = (
+    "| tstats count WHERE index=notable BY _time span={span}s")
+UNCLOSED_NOTABLE_COUNT_QUERY = """
+    search `notable`
+    | search (NOT `suppression` AND NOT status=5)
+    | bin _time span={span}s
+    | stats count BY _time"""
+
+# Pre-scan bucket, a day
+DEFAULT_PRESCAN_SPAN = 86400
+# Widest UTC offset of a Splunk user time zone
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+
+def plan_ranges(base_url, token, earliest_time, latest_time="now",
+                target_events=DEFAULT_TARGET_EVENTS, span=DEFAULT_SPAN):
+    """
+    Plan search ranges holding about {target_events} notable events each.
+
+    A cheap `tstats` pass counts notable events per {span} seconds, then
+    consecutive spans are merged up to {target_events} and hot spans are
+    split into equal slices. Empty spans are merged into their neighbours,
+    so the ranges still cover the whole time range, but a time range
+    without notable events gives no range at all.
+
+    The counts include closed notable events, `tstats` can not filter on
+    status, so ranges are sized on an upper bound.
+
+    A relative {latest_time} like "now" is resolved in UTC here, but
+    Splunk reads range strings in the user time zone. It is sent to
+    Splunk as is, and the last range ends at it, so a time zone ahead of
+    UTC never loses its last hours.
+
+    Arguments:
+        base_url -- Splunk instance base URL.
+        token -- Splunk access token.
+        earliest_time -- Start of the time range.
+
+    Keyword arguments:
+        latest_time -- End of the time range. Default: "now".
+        target_events -- Notable events per range. Default: 50000.
+        span -- Counting span in seconds. Default: 3600.
+
+    Returns:
+        list -- Ranges like `generate_daily_ranges` with an extra `count`,
+        or None if the counting search or its job failed, callers fall
+        back to fixed ranges then. An empty list means no notable event.
+    """
+    start = _naive(parse_date(earliest_time))
+    end = _naive(parse_date(latest_time))
+    relative_end = _is_relative(latest_time)
+    if relative_end:
+        # Cover the spans of any user time zone, Splunk bounds the counts
+        end += MAX_UTC_OFFSET
+    if start >= end:
+        return []
+
+    results = splunk_helpers.splunk_search(
+        base_url, token, NOTABLE_COUNT_QUERY.format(span=span),
+        earliest_time=start.strftime(RANGE_TIME_FORMAT),
+        latest_time=latest_time if relative_end
+        else end.strftime(RANGE_TIME_FORMAT),
+    )
+    if results is None:
+        # A failed job is not "no notable event", never plan [] from it
+        logging.warning(
+            "Failed to count notable events to plan ranges, "
+            "using fixed ranges.")
+        return None
+
+    counts = []
+    for row in results:
+        count = int(row.get("count") or 0)
+        if count and row.get("_time"):
+            counts.append((_naive(parse_date(row["_time"])), count))
+
+    ranges = build_ranges(counts, start, end, target_events, span)
+    if ranges and relative_end:
+        ranges[-1]["end"] = latest_time
+    logging.info(
+        f"Planned {len(ranges)} ranges for "
+        f"{sum(count for _, count in counts)} notable events "
+        f"(target {target_events} per range).")
+    return ranges
+
+
+def build_ranges(counts, start, end, target_events=DEFAULT_TARGET_EVENTS,
+                 span=DEFAULT_SPAN):
+    """
+    Build ranges from per-span event counts.
+
+    Arguments:
+        counts -- List of (span start datetime, count), spans without
+        events may be left out.
+        start -- Start datetime of the time range.
+        end -- End datetime of the time range, exclusive.
+
+    Keyword arguments:
+        target_events -- Notable events per range.
+        span -- Span length in seconds.
+
+    Returns:
+        list -- Contiguous ranges, `start` and `end` inclusive to the
+        second like `generate_daily_ranges`, and the `count` planned.
+    """
+    target_events = max(1, target_events)
+    span = timedelta(seconds=span)
+
+    # (slice start, slice end, count) of every non-empty slice
+    slices = []
+    for span_start, count in sorted(counts):
+        slice_start = max(span_start, start)
+        slice_end = min(span_start + span, end)
+        if slice_end <= slice_start:
+            continue
+
+        seconds = (slice_end - slice_start).total_seconds()
+        parts = min(
+            math.ceil(count / target_events),
+            max(1, int(seconds // MIN_SLICE_SECONDS)))
+        step = timedelta(seconds=math.ceil(seconds / parts))
+        for i in range(parts):
+            part_start = slice_start + step * i
+            if part_start >= slice_end:
+                break
+            part_end = min(part_start + step, slice_end)
+            slices.append((part_start, part_end,
+                           count // parts + (i < count % parts)))
+
+    if not slices:
+        return []
+
+    # Group slices up to the target
+    groups = []
+    for slice_start, slice_end, count in slices:
+        if groups and groups[-1][1] + count <= target_events:
+            groups[-1][1] += count
+        else:
+            groups.append([slice_start, count])
+
+    ranges = []
+    for i, (group_start, count) in enumerate(groups):
+        range_start = start if i == 0 else group_start
+        range_end = end if i == len(groups) - 1 else groups[i + 1][0]
+        ranges.append({
+            "start": range_start.strftime(RANGE_TIME_FORMAT),
+            "end": (range_end - timedelta(seconds=1)).strftime(
+                RANGE_TIME_FORMAT),
+            "count": count,
+        })
+    return ranges
+
+
+def count_unclosed_notables(base_url, token, earliest_time,
+                            latest_time="now", span=DEFAULT_PRESCAN_SPAN):
+    """
+    Count unclosed notable events per {span} seconds in one search.
+
+    Arguments:
+        base_url -- Splunk instance base URL.
+        token -- Splunk access token.
+        earliest_time -- Start of the time range.
+
+    Keyword arguments:
+        latest_time -- End of the time range. Default: "now".
+        span -- Bucket length in seconds. Default: a day.
+
+    Returns:
+        list -- (bucket start datetime, count) of non-empty buckets, or
+        None if the search or its job failed. Only an empty list means
+        every bucket is empty.
+    """
+    results = splunk_helpers.splunk_search(
+        base_url, token, UNCLOSED_NOTABLE_COUNT_QUERY.format(span=span),
+        earliest_time=earliest_time, latest_time=latest_time,
+    )
+    if results is None:
+        # A failed job must not drop every range as empty
+        logging.warning("Failed to pre-scan unclosed notable events.")
+        return None
+
+    counts = []
+    for row in results:
+        count = int(row.get("count") or 0)
+        if count and row.get("_time"):
+            counts.append((_naive(parse_date(row["_time"])), count))
+    return sorted(counts)
+
+
+def skip_empty_ranges(ranges, counts, span=DEFAULT_PRESCAN_SPAN):
+    """
+    Keep only ranges overlapping a bucket with unclosed notable events.
+
+    A range is kept when any non-empty bucket touches it, even partly, so
+    bucket boundaries never drop events.
+
+    Arguments:
+        ranges -- Ranges with inclusive `start` and `end` strings.
+        counts -- (bucket start datetime, count) of non-empty buckets.
+
+    Keyword arguments:
+        span -- Bucket length in seconds. Default: a day.
+
+    Returns:
+        list -- Ranges to search, in the original order.
+    """
+    span = timedelta(seconds=span)
+    buckets = sorted(bucket for bucket, count in counts if count)
+    kept = []
+    for date in ranges:
+        start = _naive(parse_date(date["start"]))
+        end = _naive(parse_date(date["end"]))
+        if _is_relative(date["end"]):
+            end += MAX_UTC_OFFSET
+        # First bucket ending after the range start
+        i = bisect_right(buckets, start - span)
+        if i < len(buckets) and buckets[i] <= end:
+            kept.append(date)
+    return kept
+
+
+def prescan_ranges(base_url, token, ranges, earliest_time,
+                   latest_time="now"):
+    """
+    Drop {ranges} without unclosed notable events, from a single daily
+    count search over the whole time range.
+
+    Returns:
+        list -- Ranges to search, all of {ranges} if the pre-scan failed.
+    """
+    if not ranges:
+        return ranges
+    counts = count_unclosed_notables(
+        base_url, token, earliest_time, latest_time)
+    if counts is None:
+        logging.warning(
+            f"Pre-scan failed, searching all {len(ranges)} ranges.")
+        return ranges
+
+    kept = skip_empty_ranges(ranges, counts)
+    logging.info(
+        f"Pre-scan found {sum(count for _, count in counts)} unclosed "
+        f"notable events, searching {len(kept)} of {len(ranges)} ranges.")
+    return kept
+
+
+def _is_relative(value):
+    # "now", "-1d", ..., everything but a fixed time
+    return not value.strip()[:4].isdigit()
+
+
+def _naive(value):
+    # Range strings are wall clock times of the Splunk user time zone
+    return value.replace(tzinfo=None, microsecond=0)
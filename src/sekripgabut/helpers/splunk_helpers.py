@@ -3,14 +3,30 @@ from sekripgabut.splunk_ops import introspection, search
 import requests
 
 
-def splunk_search(base_url, token, query, **kwargs):
+# Search modes
+# job: create a search job, wait, then paginate its results
+# export: stream results from the export endpoint in a single request
+SEARCH_MODE_JOB = "job"
+SEARCH_MODE_EXPORT = "export"
+SEARCH_MODES = (SEARCH_MODE_JOB, SEARCH_MODE_EXPORT)
+
+
+def splunk_search(base_url, token, query, mode=SEARCH_MODE_JOB, **kwargs):
     try:
+        if mode == SEARCH_MODE_EXPORT:
+            results = []
+            for page in search.export_search(
+                    base_url, token, query, **kwargs):
+                results.extend(page)
+            return results
+
         # Log the start of the search
         logging.info("Starting search...")
 
         # Start the search job and get the SID
         sid = search.set_search_jobs(base_url, token, query, **kwargs)
         logging.info(f"Search job started with SID: {sid}")
+        search.wait_for_job(base_url, token, sid)
 
         # Fetch the search results
         logging.info("Fetching results...")
@@ -19,6 +35,9 @@ def splunk_search(base_url, token, query, **kwargs):
         # Return the search results
         return results
 
+    except search.SearchJobFailed as e:
+        # Not an empty result, callers tell None apart from []
+        logging.error(f"Search failed: {e}")
     except requests.exceptions.RequestException as e:
         # Log network-related errors
         logging.error(f"Request failed: {e}")
@@ -30,3 +49,39 @@ def splunk_search(base_url, token, query, **kwargs):
         logging.error(f"An unexpected error occurred: {e}")
 
     return None
+
+
+def iter_splunk_search(base_url, token, query, page_size=1000, prefetch=1,
+                       mode=SEARCH_MODE_JOB, **kwargs):
+    """Run a search and yield its results page by page.
+
+    Unlike `splunk_search`, errors are raised to the caller.
+
+    Arguments:
+    base_url -- Splunk instance base URL.
+    token -- Splunk access token.
+    query -- The search query.
+
+    Keyword arguments:
+    page_size -- Results per page. Default: 1000.
+    prefetch -- Pages to fetch ahead while the caller works on the current
+    page. Default: 1.
+    mode -- "job" or "export". Default: "job".
+    kwargs -- Additional search parameters.
+
+    Yields:
+    list -- A page of results.
+    """
+    if mode == SEARCH_MODE_EXPORT:
+        yield from search.export_search(
+            base_url, token, query, page_size=page_size, **kwargs)
+        return
+
+    logging.info("Starting search...")
+    sid = search.set_search_jobs(base_url, token, query, **kwargs)
+    logging.info(f"Search job started with SID: {sid}")
+    search.wait_for_job(base_url, token, sid)
+
+    logging.info("Fetching results...")
+    yield from search.iter_search_results(
+        base_url, token, sid, page_size=page_size, prefetch=prefetch)
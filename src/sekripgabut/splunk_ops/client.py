@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from sekripgabut.splunk_ops.retry import (
+    DEFAULT_BREAKER_RESET,
+    DEFAULT_BREAKER_THRESHOLD,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    parse_retry_after,
+)
+from sekripgabut.utils import metrics
+
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+# Defaults
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (10, 300)  # (connect, read) in seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+
+class SplunkClient:
+    """Pooled HTTP client for a single Splunk instance.
+
+    Every REST call against the same search head goes through one
+    `requests.Session`, so TCP/TLS connections are kept alive and reused
+    instead of being re-negotiated per request.
+
+    Arguments:
+    base_url -- Splunk instance base URL.
+    token -- Splunk access token.
+
+    Keyword arguments:
+    pool_size -- Max connections kept alive in the pool.
+    timeout -- Request timeout, a number or a (connect, read) tuple.
+    retries -- Retries of transient failures, see `RetryPolicy`.
+    backoff_factor -- Backoff base delay between retries, in seconds.
+    verify -- Verify TLS certificate. Default: False.
+    breaker_threshold -- Consecutive failures pausing every request.
+    breaker_reset -- Seconds requests are paused by the circuit breaker.
+    """
+
+    def __init__(self, base_url, token,
+                 pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 verify=False,
+                 breaker_threshold=DEFAULT_BREAKER_THRESHOLD,
+                 breaker_reset=DEFAULT_BREAKER_RESET):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.verify = verify
+
+        self.retry_policy = RetryPolicy(
+            max_attempts=retries + 1, base_delay=backoff_factor)
+        self.breaker = CircuitBreaker(
+            breaker_threshold, breaker_reset, name=self.base_url)
+
+        # Retries are done by `request`, not by urllib3
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=0,
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Connection": "keep-alive",
+        })
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path):
+        """Build full URL of the {path} endpoint."""
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, operation=None, idempotent=None,
+                **kwargs):
+        """Send a request to the {path} endpoint through the pool.
+
+        Transient failures are retried following the client `RetryPolicy`,
+        and requests are paused while the circuit breaker is open.
+
+        Keyword arguments:
+        operation -- Name the latency is recorded under. Default: "http".
+        idempotent -- Whether the request is safe to send twice. Default:
+        by method, POST is not.
+        kwargs -- Arguments for `requests.Session.request`.
+
+        Returns:
+        requests.Response -- The last response, it may be an error one
+        when retries run out.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("verify", self.verify)
+        policy = self.retry_policy
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            trial = None
+            waiting = False
+            try:
+                trial = self.breaker.before_request()
+                response = self.session.request(
+                    method, self.url(path), **kwargs)
+            except requests.exceptions.RequestException as e:
+                # Waiting for a running half-open trial is not an attempt
+                waiting = getattr(e, "trial_running", False)
+                if not isinstance(e, CircuitOpenError):
+                    metrics.inc("http_errors")
+                    self.breaker.record_failure()
+                if not waiting and not policy.should_retry_error(
+                        method, e, attempt, idempotent):
+                    raise
+                delay = max(policy.delay(attempt), self.breaker.remaining())
+                logging.warning(
+                    f"{method} {path} failed ({e}), retry "
+                    f"{attempt + 1} in {delay:.2f}s")
+            else:
+                _record_response(response, kwargs.get("stream"))
+                if response.status_code not in policy.retry_statuses:
+                    self.breaker.record_success()
+                    return response
+
+                self.breaker.record_failure()
+                if not policy.should_retry_status(
+                        method, response.status_code, attempt, idempotent):
+                    return response
+                delay = policy.delay(attempt, parse_retry_after(
+                    response.headers.get("Retry-After")))
+                response.close()
+                logging.warning(
+                    f"{method} {path} returned {response.status_code}, "
+                    f"retry {attempt + 1} in {delay:.2f}s")
+            finally:
+                self.breaker.end_trial(trial)
+                metrics.observe(
+                    operation or metrics.OP_HTTP, time.perf_counter() - start)
+
+            if not waiting:
+                metrics.inc("retries")
+                attempt += 1
+            time.sleep(delay)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def _record_response(response, stream=False):
+    metrics.inc("http_requests")
+    body = response.request.body
+    if body:
+        metrics.inc("bytes_sent", len(body))
+    if not stream:
+        metrics.inc("bytes_received", len(response.content))
+    if response.status_code >= 400:
+        metrics.inc("http_errors")
+
+
+# Shared clients, one per (base_url, token)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def configure_client(base_url, token, **kwargs):
+    """Create (or replace) the shared client for {base_url} and {token}.
+
+    Keyword arguments are passed to `SplunkClient`.
+
+    Returns:
+    SplunkClient -- The shared client.
+    """
+    key = (base_url.rstrip("/"), token)
+    client = SplunkClient(base_url, token, **kwargs)
+    with _clients_lock:
+        old_client = _clients.get(key)
+        _clients[key] = client
+    if old_client:
+        old_client.close()
+    logging.debug(
+        f"Configured Splunk client for {key[0]} "
+        f"(pool_size={client.pool_size}, timeout={client.timeout})")
+    return client
+
+
+def get_client(base_url, token):
+    """Get the shared client for {base_url} and {token}.
+
+    The client is created with default settings on first use.
+    """
+    key = (base_url.rstrip("/"), token)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = SplunkClient(base_url, token)
+            _clients[key] = client
+    return client
+
+
+def close_clients():
+    """Close every shared client connection pool."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def load_client_options(config, section="Client"):
+    """Read `SplunkClient` options from the {section} config section.
+
+    Example:
+    [Client]
+    pool_size = 10
+    connect_timeout = 10
+    read_timeout = 300
+    retries = 3
+    backoff_factor = 0.5
+    breaker_threshold = 5
+    breaker_reset = 30
+
+    Returns:
+    dict -- Keyword arguments for `configure_client`.
+    """
+    if not config.has_section(section):
+        return {}
+
+    return {
+        "pool_size": config.getint(
+            section, "pool_size", fallback=DEFAULT_POOL_SIZE),
+        "timeout": (
+            config.getfloat(
+                section, "connect_timeout", fallback=DEFAULT_TIMEOUT[0]),
+            config.getfloat(
+                section, "read_timeout", fallback=DEFAULT_TIMEOUT[1]),
+        ),
+        "retries": config.getint(
+            section, "retries", fallback=DEFAULT_RETRIES),
+        "backoff_factor": config.getfloat(
+            section, "backoff_factor", fallback=DEFAULT_BACKOFF_FACTOR),
+        "breaker_threshold": config.getint(
+            section, "breaker_threshold", fallback=DEFAULT_BREAKER_THRESHOLD),
+        "breaker_reset": config.getfloat(
+            section, "breaker_reset", fallback=DEFAULT_BREAKER_RESET),
+    }
@@ -1,16 +1,16 @@
 # import json
 import jmespath
 import requests
-import urllib3
 import logging
-
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from sekripgabut.splunk_ops.client import get_client
 
 
 # Endpoints
 SERVER_INFO = "/services/server/info"
 
+# Compiled once, not on every call
+SERVER_VERSION = jmespath.compile("entry[0].content.version")
+
 
 def get_server_info(base_url, token):
     """Get Splunk instance information.
@@ -22,12 +22,11 @@ def get_server_info(base_url, token):
     Returns:
     dict -- JSON response from splunk server info. Otherwise None
     """
-    endpoint = f"{base_url}{SERVER_INFO}"
-    headers = {"Authorization": f"Bearer {token}"}
+    client = get_client(base_url, token)
+    endpoint = client.url(SERVER_INFO)
     params = {"output_mode": "json"}
     try:
-        response = requests.get(
-            endpoint, headers=headers, params=params, verify=False)
+        response = client.get(SERVER_INFO, params=params)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.ConnectionError as e:
@@ -55,9 +54,7 @@ def get_splunk_version(base_url, token):
     try:
         splunk_info = get_server_info(base_url, token)
         if splunk_info:
-            expression = "entry[0].content.version"
-            splunk_version = jmespath.search(expression, splunk_info)
-            return splunk_version
+            return SERVER_VERSION.search(splunk_info)
     except Exception as e:
         logging.error(f"Failed to retrieve splunk info: {e}")
     return None
@@ -0,0 +1,274 @@
+"""
+Typed views of Splunk REST responses.
+
+Fields are pulled out of the JSON by jmespath expressions compiled once at
+import, instead of parsing the same expression strings on every poll and
+every page. The classes use `__slots__`, they are created per poll, per
+page and per `notable_update` batch.
+"""
+import jmespath
+
+
+# Search job status, `GET search/jobs/{sid}`
+JOB_STATUS = jmespath.compile(
+    "entry[0].content.{"
+    "dispatch_state: dispatchState, "
+    "is_done: isDone, "
+    "is_failed: isFailed, "
+    "done_progress: doneProgress, "
+    "event_count: eventCount, "
+    "result_count: resultCount, "
+    "run_duration: runDuration, "
+    "messages: messages"
+    "}")
+
+# Result page, `GET search/jobs/{sid}/results` in json or json_cols
+RESULT_PAGE = jmespath.compile(
+    "{"
+    "results: results, "
+    "fields: fields, "
+    "columns: columns, "
+    "init_offset: init_offset, "
+    "preview: preview, "
+    "messages: messages"
+    "}")
+
+# `POST notable_update` response
+NOTABLE_UPDATE_RESULT = jmespath.compile(
+    "{"
+    "success: success, "
+    "success_count: success_count, "
+    "failure_count: failure_count, "
+    "message: message, "
+    "details: details"
+    "}")
+
+
+class SearchJobStatus:
+    """
+    Status of a search job.
+
+    Arguments:
+        sid -- Search job ID.
+        dispatch_state -- QUEUED, PARSING, RUNNING, FINALIZING, DONE,
+            FAILED or PAUSED.
+        is_done -- Whether the job is done.
+        is_failed -- Whether the job failed.
+        done_progress -- Progress from 0.0 to 1.0.
+        event_count -- Events the job returned.
+        result_count -- Results the job returned.
+        run_duration -- Seconds the job has run.
+        messages -- Messages of the job.
+        raw -- The JSON response.
+    """
+
+    __slots__ = (
+        "sid", "dispatch_state", "is_done", "is_failed", "done_progress",
+        "event_count", "result_count", "run_duration", "messages", "raw",
+    )
+
+    def __init__(self, sid=None, dispatch_state=None, is_done=False,
+                 is_failed=False, done_progress=0.0, event_count=0,
+                 result_count=0, run_duration=0.0, messages=None, raw=None):
+        self.sid = sid
+        self.dispatch_state = dispatch_state
+        self.is_done = is_done
+        self.is_failed = is_failed
+        self.done_progress = done_progress
+        self.event_count = event_count
+        self.result_count = result_count
+        self.run_duration = run_duration
+        self.messages = messages or []
+        self.raw = raw
+
+    @classmethod
+    def from_response(cls, job_info, sid=None):
+        """Build the status from a search job JSON response."""
+        content = JOB_STATUS.search(job_info or {}) or {}
+        return cls(
+            sid=sid,
+            dispatch_state=content.get("dispatch_state"),
+            is_done=_to_bool(content.get("is_done")),
+            is_failed=_to_bool(content.get("is_failed")),
+            done_progress=_to_float(content.get("done_progress")),
+            event_count=_to_int(content.get("event_count")),
+            result_count=_to_int(content.get("result_count")),
+            run_duration=_to_float(content.get("run_duration")),
+            messages=content.get("messages"),
+            raw=job_info,
+        )
+
+    @property
+    def failed(self):
+        """Whether the job ended FAILED, as `isFailed` or dispatchState."""
+        return self.is_failed or self.dispatch_state == "FAILED"
+
+    def remaining_seconds(self):
+        """Estimated seconds until the job is done, None if unknown."""
+        if 0 < self.done_progress < 1 and self.run_duration > 0:
+            return (self.run_duration * (1 - self.done_progress)
+                    / self.done_progress)
+        return None
+
+    def __repr__(self):
+        return (f"SearchJobStatus(sid={self.sid!r}, "
+                f"dispatch_state={self.dispatch_state!r}, "
+                f"done_progress={self.done_progress}, "
+                f"event_count={self.event_count}, "
+                f"result_count={self.result_count})")
+
+
+class ResultPage:
+    """
+    A page of search results, as rows or as columns.
+
+    Arguments:
+        rows -- List of row dicts, output_mode json.
+        fields -- Field names of {columns}.
+        columns -- List of values per field, output_mode json_cols.
+        init_offset -- Offset of the first result.
+        preview -- Whether the results are a preview.
+        messages -- Messages of the page.
+    """
+
+    __slots__ = (
+        "rows", "fields", "columns", "init_offset", "preview", "messages",
+    )
+
+    def __init__(self, rows=None, fields=None, columns=None, init_offset=0,
+                 preview=False, messages=None):
+        self.rows = rows
+        self.fields = fields or []
+        self.columns = columns
+        self.init_offset = init_offset
+        self.preview = preview
+        self.messages = messages or []
+
+    @classmethod
+    def from_response(cls, data):
+        """Build the page from a json or json_cols results response."""
+        page = RESULT_PAGE.search(data or {}) or {}
+        columns = page.get("columns")
+        return cls(
+            rows=page.get("results") if columns is None else None,
+            # Field names, or {"name": ...} objects on newer versions
+            fields=[
+                field["name"] if isinstance(field, dict) else field
+                for field in page.get("fields") or []
+            ],
+            columns=columns,
+            init_offset=_to_int(page.get("init_offset")),
+            preview=_to_bool(page.get("preview")),
+            messages=page.get("messages"),
+        )
+
+    def __len__(self):
+        if self.columns is not None:
+            return len(self.columns[0]) if self.columns else 0
+        return len(self.rows or [])
+
+    def to_columns(self, fields=None):
+        """
+        Returns:
+            dict -- Field to list of values, every field if {fields} is
+            None. A field missing from a row is None in its column.
+        """
+        if self.columns is not None:
+            page = dict(zip(self.fields, self.columns))
+        else:
+            rows = self.rows or []
+            names = fields or (list(rows[0]) if rows else [])
+            page = {name: [row.get(name) for row in rows] for name in names}
+        if fields:
+            size = len(self)
+            page = {name: page.get(name, [None] * size) for name in fields}
+        return page
+
+    def to_rows(self, fields=None):
+        """
+        Returns:
+            list -- Row dicts with only {fields}, every field if None.
+        """
+        if self.columns is None:
+            rows = self.rows or []
+            if fields:
+                rows = [
+                    {key: row[key] for key in fields if key in row}
+                    for row in rows
+                ]
+            return rows
+        page = self.to_columns(fields)
+        return [
+            {name: value for name, value in zip(page, row)
+             if value is not None}
+            for row in zip(*page.values())
+        ]
+
+
+class NotableUpdateResult:
+    """
+    Result of a `notable_update` request.
+
+    Arguments:
+        success -- Whether the API reports success.
+        success_count -- Notable events updated.
+        failure_count -- Notable events not updated.
+        message -- Message of the API.
+        details -- Failure details of the API.
+        raw -- The JSON response.
+    """
+
+    __slots__ = (
+        "success", "success_count", "failure_count", "message", "details",
+        "raw",
+    )
+
+    def __init__(self, success=False, success_count=0, failure_count=0,
+                 message=None, details=None, raw=None):
+        self.success = success
+        self.success_count = success_count
+        self.failure_count = failure_count
+        self.message = message
+        self.details = details
+        self.raw = raw
+
+    @classmethod
+    def from_response(cls, response_data):
+        """Build the result from a `notable_update` JSON response."""
+        if not isinstance(response_data, dict):
+            return cls(message=response_data, raw=response_data)
+        result = NOTABLE_UPDATE_RESULT.search(response_data) or {}
+        return cls(
+            success=_to_bool(result.get("success")),
+            success_count=_to_int(result.get("success_count")),
+            failure_count=_to_int(result.get("failure_count")),
+            message=result.get("message"),
+            details=result.get("details"),
+            raw=response_data,
+        )
+
+    def __repr__(self):
+        return (f"NotableUpdateResult(success={self.success}, "
+                f"success_count={self.success_count}, "
+                f"failure_count={self.failure_count})")
+
+
+def _to_bool(value):
+    # Older Splunk versions send "0"/"1" strings
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true")
+    return bool(value)
+
+
+def _to_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return int(_to_float(value))
+
+
+def _to_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,255 @@
+import logging
+import random
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+# Defaults
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_MAX_RETRY_AFTER = 120.0
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_RESET = 30.0
+
+# Transient statuses, retried for idempotent requests
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# The server refused the request without processing it, safe to retry
+# whatever the method is
+REJECTED_STATUS_CODES = (429, 503)
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised when the circuit breaker does not let requests through.
+
+    A `ConnectionError`, so callers handling request failures handle an
+    open circuit the same way.
+    """
+
+    # Set when the circuit is half-open and the trial request is running,
+    # waiting for it is not a failed attempt
+    trial_running = False
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a Splunk REST call.
+
+    Idempotent requests are retried on connection errors and transient
+    statuses. Other requests, like dispatching a search job, are retried
+    only when the request surely did not reach the server (connect
+    errors) or was rejected (429/503), so a retry never runs twice.
+
+    Delays use full jitter exponential backoff, a `Retry-After` header
+    wins when it asks for longer.
+
+    Arguments:
+        max_attempts -- Attempts per request, the first one included.
+        base_delay -- Backoff base in seconds.
+        max_delay -- Max backoff in seconds.
+        max_retry_after -- Max `Retry-After` honored in seconds.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY,
+                 max_retry_after=DEFAULT_MAX_RETRY_AFTER,
+                 retry_statuses=RETRY_STATUS_CODES):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def is_idempotent(self, method, idempotent=None):
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in IDEMPOTENT_METHODS
+
+    def should_retry_status(self, method, status, attempt, idempotent=None):
+        """Whether a {status} response of attempt {attempt} is retried."""
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if status in REJECTED_STATUS_CODES:
+            return True
+        return (status in self.retry_statuses
+                and self.is_idempotent(method, idempotent))
+
+    def should_retry_error(self, method, error, attempt, idempotent=None):
+        """Whether an {error} raised by attempt {attempt} is retried."""
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if isinstance(error, CircuitOpenError):
+            return True
+        if is_connect_error(error):
+            return True
+        return (is_transient_error(error)
+                and self.is_idempotent(method, idempotent))
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before the attempt after {attempt}."""
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, backoff)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a saturated search head for a while.
+
+    After {failure_threshold} failures in a row the circuit opens and
+    requests fail fast with `CircuitOpenError` for {reset_timeout}
+    seconds. Then a single trial request is let through (half-open), its
+    success closes the circuit and its failure opens it again. Requests
+    made while the trial runs wait at least {reset_timeout} seconds.
+
+    Arguments:
+        failure_threshold -- Consecutive failures opening the circuit.
+        reset_timeout -- Seconds the circuit stays open.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_BREAKER_THRESHOLD,
+                 reset_timeout=DEFAULT_BREAKER_RESET, name=""):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at = None
+        self._trial = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def remaining(self):
+        """Seconds until the open circuit lets a trial request through,
+        {reset_timeout} while the trial request is running."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            if self._trial is not None:
+                return self.reset_timeout
+            return max(
+                0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def before_request(self):
+        """
+        Returns:
+            object -- The trial token if this request is the half-open
+            trial, None otherwise. Pass it to `end_trial` once the request
+            is over.
+
+        Raises:
+            CircuitOpenError -- If the circuit is open, or half-open with
+            the trial request still running.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return None
+            if state == "half-open" and self._trial is None:
+                self._trial = object()
+                return self._trial
+            trial_running = state == "half-open"
+        error = CircuitOpenError(
+            f"Circuit open for {self.name or 'Splunk'}, "
+            f"retry in {self.remaining():.1f}s")
+        error.trial_running = trial_running
+        raise error
+
+    def end_trial(self, trial):
+        """
+        Let a new trial request through if {trial} ended without a
+        success or failure recorded, e.g. on an unexpected exception.
+        """
+        if trial is None:
+            return
+        with self._lock:
+            if self._trial is trial:
+                self._trial = None
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logging.info(f"Circuit closed for {self.name or 'Splunk'}.")
+            self.failures = 0
+            self.opened_at = None
+            self._trial = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            threshold = self.failures >= self.failure_threshold
+            if self._trial is not None or (
+                    self.opened_at is None and threshold):
+                logging.warning(
+                    f"Circuit opened for {self.name or 'Splunk'} after "
+                    f"{self.failures} failures, pausing requests for "
+                    f"{self.reset_timeout}s.")
+                self.opened_at = time.monotonic()
+            self._trial = None
+
+
+def is_transient_error(error):
+    """Whether {error} is a connection or timeout error worth a retry."""
+    if isinstance(error, (requests.exceptions.ConnectionError,
+                          requests.exceptions.Timeout)):
+        return True
+    asyncio, aiohttp = _async_modules()
+    return ((asyncio is not None
+             and isinstance(error, asyncio.TimeoutError))
+            or (aiohttp is not None
+                and isinstance(error, aiohttp.ClientError)))
+
+
+def is_connect_error(error):
+    """Whether {error} happened before the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    _, aiohttp = _async_modules()
+    if aiohttp is not None and isinstance(
+            error, aiohttp.ClientConnectorError):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = str(error)
+        return ("NewConnectionError" in reason
+                or "Connection refused" in reason
+                or "Name or service not known" in reason)
+    return False
+
+
+def parse_retry_after(value):
+    """Seconds asked by a `Retry-After` header value, None if invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _async_modules():
+    # Only the async client raises their errors, and it has imported them
+    # already. The sync client does not pay for importing them
+    return sys.modules.get("asyncio"), sys.modules.get("aiohttp")
@@ -1,16 +1,19 @@
 import requests
+import csv
+import io
 import json
 import time
-import urllib3
 import logging
-
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from sekripgabut.splunk_ops.client import get_client
+from sekripgabut.splunk_ops.models import ResultPage, SearchJobStatus
+from sekripgabut.utils import metrics
+from sekripgabut.utils.gabutils import iter_prefetch
 
 # Endpoints
 # common
 SEARCH_JOBS = "/services/search/jobs"
 SEARCH_JOBS_SID = "/services/search/jobs/{search_id}"
+SEARCH_JOBS_SID_CONTROL = "/services/search/jobs/{search_id}/control"
 SEARCH_SID_SUMMARY = (
     "/services/search/jobs/{search_id}/summary")
 # V1
@@ -27,11 +30,45 @@ SEARCH_JOBS_SID_EVENTS_V2 = (
 SEARCH_JOBS_SID_RESULTS_V2 = (
     "/services/search/v2/jobs/{search_id}/results")
 
+# Output modes of result pages
+RESULTS_JSON = "json"
+RESULTS_JSON_COLS = "json_cols"
+RESULTS_CSV = "csv"
+
+# Search job polling
+POLL_INITIAL_INTERVAL = 0.25
+POLL_MAX_INTERVAL = 10.0
+POLL_BACKOFF = 1.5
+
+
+class SearchJobCancelled(Exception):
+    """Raised when waiting for a search job is cancelled."""
+
+
+class SearchJobFailed(Exception):
+    """
+    Raised when a search job ends FAILED, its results are not the events
+    of the range.
+
+    Arguments:
+        sid -- Search job ID.
+        messages -- Messages of the job, {"type": ..., "text": ...} dicts.
+    """
+
+    def __init__(self, sid, messages=None):
+        self.sid = sid
+        self.messages = messages or []
+        texts = "; ".join(
+            str(message.get("text", message))
+            if isinstance(message, dict) else str(message)
+            for message in self.messages)
+        super().__init__(
+            f"Search job {sid} failed" + (f": {texts}" if texts else ""))
+
 
 def get_search_jobs(base_url, token, output_mode="json", **kwargs):
     """Get details of all current searches."""
-    endpoint = f"{base_url}{SEARCH_JOBS}"
-    headers = {"Authorization": f"Bearer {token}"}
+    client = get_client(base_url, token)
     params = {
         "output_mode": output_mode
     }
@@ -39,8 +76,7 @@ def get_search_jobs(base_url, token, output_mode="json", **kwargs):
     if kwargs:
         params.update(kwargs)
 
-    response = requests.get(endpoint, headers=headers,
-                            params=params, verify=False)
+    response = client.get(SEARCH_JOBS, params=params)
 
     if response.status_code == 200:
         return response.text
@@ -69,8 +105,8 @@ def set_search_jobs(base_url, token, query,
         Exception: If the request fails, logs the error and raises an
         exception.
     """
-    endpoint = f"{base_url}{SEARCH_JOBS}"
-    headers = {"Authorization": f"Bearer {token}"}
+    client = get_client(base_url, token)
+    endpoint = client.url(SEARCH_JOBS)
     payload = {
             "search": query,
             "earliest_time": earliest_time,
@@ -83,8 +119,8 @@ def set_search_jobs(base_url, token, query,
 
     try:
         logging.info("Initiating search jobs...")
-        response = requests.post(endpoint, headers=headers,
-                                 data=payload, verify=False)
+        response = client.post(
+            SEARCH_JOBS, data=payload, operation=metrics.OP_DISPATCH)
         response.raise_for_status()
 
         # Validate the response JSON and extract 'sid'
@@ -112,8 +148,9 @@ def set_search_jobs(base_url, token, query,
 
 def get_search_job_by_sid(base_url, token, sid, output_mode="json", **kwargs):
     """Manage the {search_id} search job."""
-    endpoint = f"{base_url}{SEARCH_JOBS_SID.format(search_id=sid)}"
-    headers = {"Authorization": f"Bearer {token}"}
+    client = get_client(base_url, token)
+    path = SEARCH_JOBS_SID.format(search_id=sid)
+    endpoint = client.url(path)
     params = {
         "output_mode": output_mode
     }
@@ -123,8 +160,8 @@ def get_search_job_by_sid(base_url, token, sid, output_mode="json", **kwargs):
 
     try:
         logging.info(f"Requesting job {sid} info...")
-        response = requests.get(endpoint, headers=headers,
-                                params=params, verify=False)
+        response = client.get(
+            path, params=params, operation=metrics.OP_POLL)
         response.raise_for_status()
 
         response_json = response.json()
@@ -134,58 +171,344 @@ def get_search_job_by_sid(base_url, token, sid, output_mode="json", **kwargs):
         raise
 
 
-def get_search_results(base_url, token, sid, **kwargs):
-    """Fetch search results per 1000 results"""
-    endpoint = f"{base_url}{SEARCH_JOBS_SID_RESULTS.format(search_id=sid)}"
-    page_count = 1000
-    headers = {"Authorization": f"Bearer {token}"}
+def get_search_job_status(base_url, token, sid):
+    """Get the status of the {sid} search job.
+
+    Returns:
+    SearchJobStatus -- Typed status of the job.
+    """
+    return SearchJobStatus.from_response(
+        get_search_job_by_sid(base_url, token, sid), sid)
+
+
+def cancel_search_job(base_url, token, sid):
+    """Cancel the {sid} search job."""
+    client = get_client(base_url, token)
+    path = SEARCH_JOBS_SID_CONTROL.format(search_id=sid)
+    try:
+        response = client.post(
+            path, data={"action": "cancel", "output_mode": "json"},
+            idempotent=True)
+        response.raise_for_status()
+        logging.info(f"Search job {sid} cancelled.")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Failed to cancel search job {sid}: {e}")
+        raise
+
+
+def wait_for_job(base_url, token, sid, timeout=None, cancel_event=None,
+                 initial_interval=POLL_INITIAL_INTERVAL,
+                 max_interval=POLL_MAX_INTERVAL,
+                 backoff=POLL_BACKOFF):
+    """Wait until the {sid} search job is done.
+
+    The job is polled fast at first, then the interval grows exponentially
+    up to {max_interval}. While the job reports `doneProgress`, the wait is
+    shortened to the estimated remaining run time.
+
+    Arguments:
+    base_url -- Splunk instance base URL.
+    token -- Splunk access token.
+    sid -- Search job ID.
+
+    Keyword arguments:
+    timeout -- Max seconds to wait. Default: None (no limit).
+    cancel_event -- `threading.Event` to stop waiting. Default: None.
+    initial_interval -- First poll interval in seconds.
+    max_interval -- Max poll interval in seconds.
+    backoff -- Poll interval multiplier.
+
+    Returns:
+    tuple -- (status, waited), the last `SearchJobStatus` and the seconds
+    spent waiting.
+
+    Raises:
+    TimeoutError -- If the job is not done within {timeout}. The job is
+    cancelled.
+    SearchJobCancelled -- If {cancel_event} is set. The job is cancelled.
+    SearchJobFailed -- If the job ends FAILED.
+    """
+    started = time.monotonic()
+    deadline = started + timeout if timeout else None
+    interval = initial_interval
+
+    while True:
+        status = get_search_job_status(base_url, token, sid)
+
+        if status.failed:
+            # A failed job is done too, with none of the range's events
+            raise SearchJobFailed(sid, status.messages)
+
+        if status.is_done:
+            waited = time.monotonic() - started
+            metrics.observe("job_wait", waited)
+            logging.info(f"Job {sid} is done after waiting {waited:.2f}s.")
+            return status, waited
+
+        delay = interval
+        remaining = status.remaining_seconds()
+        if remaining is not None:
+            delay = min(delay, max(initial_interval, remaining))
+        delay = min(delay, max_interval)
+
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                cancel_search_job(base_url, token, sid)
+                raise TimeoutError(
+                    f"Search job {sid} is not done after {timeout}s")
+            delay = min(delay, left)
+
+        logging.debug(
+            f"Job {sid}: dispatchState={status.dispatch_state}, "
+            f"doneProgress={status.done_progress}, "
+            f"next poll in {delay:.2f}s")
+
+        if cancel_event is not None:
+            if cancel_event.wait(delay):
+                cancel_search_job(base_url, token, sid)
+                raise SearchJobCancelled(f"Waiting for job {sid} cancelled")
+        else:
+            time.sleep(delay)
+
+        interval = min(interval * backoff, max_interval)
+
+
+def iter_search_results(base_url, token, sid, page_size=1000,
+                        prefetch=0, fields=None, output_mode=RESULTS_JSON,
+                        columns=False, **kwargs):
+    """Iterate search results of the {sid} search job page by page.
+
+    Each page is yielded as soon as it arrives, so callers can start
+    working on the first page without holding every result in memory.
+
+    Hot loops needing a few fields should ask for {fields} only, and
+    "json_cols" or "csv" pages, which name each field once per page
+    instead of once per row.
+
+    Arguments:
+    base_url -- Splunk instance base URL.
+    token -- Splunk access token.
+    sid -- Search job ID.
+
+    Keyword arguments:
+    page_size -- Results per page. Default: 1000.
+    prefetch -- Pages to fetch ahead in the background while the caller
+    works on the current page. Default: 0 (fetch on demand).
+    fields -- Fields to return, projected server-side. Default: all.
+    output_mode -- "json", "json_cols" or "csv". Default: "json".
+    columns -- Yield pages as columns instead of rows. Default: False.
+    kwargs -- Additional request parameters.
+
+    Yields:
+    list or dict -- A page of results, a list of rows, or a dict of
+    field to list of values if {columns}.
+    """
+    pages = _iter_search_result_pages(
+        base_url, token, sid, page_size=page_size, fields=fields,
+        output_mode=output_mode, columns=columns, **kwargs)
+    if prefetch:
+        pages = iter_prefetch(pages, prefetch)
+    yield from pages
+
+
+def _iter_search_result_pages(base_url, token, sid, page_size=1000,
+                              fields=None, output_mode=RESULTS_JSON,
+                              columns=False, **kwargs):
+    client = get_client(base_url, token)
+    path = SEARCH_JOBS_SID_RESULTS.format(search_id=sid)
     params = {
-        "output_mode": "json",
-        "count": page_count,
+        "output_mode": output_mode,
+        "count": page_size,
         "offset": 0,
     }
+    if fields:
+        params["f"] = list(fields)
 
     if kwargs:
         params.update(kwargs)
+    page_count = int(params["count"])
 
-    all_results = []
+    total = 0
     while True:
-        response = requests.get(
-            endpoint, headers=headers, params=params, verify=False
-        )
+        response = client.get(
+            path, params=params, operation=metrics.OP_RESULTS_PAGE)
 
         if response.status_code == 204:
             # No result yet; wait for the job to complete
-            time.sleep(3)
+            wait_for_job(base_url, token, sid)
             continue
 
         if response.status_code not in (200, 201):
             raise Exception(f"Failed to fetch results: {response.text}")
 
         # Parse the response
-        response_json = response.json()
-
-        results = response_json.get("results", [])
-        if not results:
-            if all_results:
+        results = decode_results_page(
+            response.text, params["output_mode"], fields, columns)
+        result_count = page_length(results)
+        if not result_count:
+            if total:
                 print("All results are fetched.")
-                break
             else:
                 print("No more results available")
-                # Break when no more results are returned
-                break
+            # Break when no more results are returned
+            break
 
-        all_results.extend(results)
-        print(f"Fetched {len(results)} results (Total: {len(all_results)})")
+        total += result_count
+        metrics.inc("results_fetched", result_count)
+        print(f"Fetched {result_count} results (Total: {total})")
+        yield results
 
-        if len(results) < page_count:
+        if result_count < page_count:
             print("Fetched final result.")
             break
         params["offset"] += page_count  # get another page
 
+
+def decode_results_page(body, output_mode=RESULTS_JSON, fields=None,
+                        columns=False):
+    """Decode a results page in any output mode to rows or columns.
+
+    Only {fields} are kept, every field if None. CSV pages are split
+    row by row and only the wanted cells are kept.
+
+    Arguments:
+    body -- Response text, or the already decoded JSON.
+
+    Keyword arguments:
+    output_mode -- "json", "json_cols" or "csv" of {body}.
+    fields -- Fields to keep. Default: all.
+    columns -- Return columns instead of rows. Default: False.
+
+    Returns:
+    list or dict -- List of row dicts, or dict of field to list of values
+    if {columns}. A field missing from a row is left out of the row, and
+    None in its column.
+    """
+    if output_mode == RESULTS_CSV:
+        names, values = _decode_csv_columns(body or "", fields)
+        page = ResultPage(fields=names, columns=values)
+    else:
+        data = json.loads(body) if isinstance(body, (str, bytes)) else body
+        page = ResultPage.from_response(data)
+
+    if columns:
+        return page.to_columns(fields)
+    return page.to_rows(fields)
+
+
+def page_length(page):
+    """Number of results of a page of rows or columns."""
+    if isinstance(page, dict):
+        return len(next(iter(page.values()), []))
+    return len(page)
+
+
+def _decode_csv_columns(text, fields=None):
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if not header:
+        return [], []
+    names = [name for name in header if not fields or name in fields]
+    indexes = [header.index(name) for name in names]
+    values = [[] for _ in names]
+    for row in reader:
+        for column, index in zip(values, indexes):
+            # Splunk writes missing fields as empty cells
+            column.append(row[index] if index < len(row) and row[index]
+                          else None)
+    return names, values
+
+
+def get_search_results(base_url, token, sid, **kwargs):
+    """Fetch all search results per 1000 results
+
+    Returns:
+    list -- All results of the {sid} search job.
+    """
+    all_results = []
+    for results in iter_search_results(base_url, token, sid, **kwargs):
+        all_results.extend(results)
+
     return all_results
 
 
+def export_search(base_url, token, query, earliest_time="",
+                  latest_time="now", page_size=1000, **kwargs):
+    """Run a search through the export endpoint and stream its results.
+
+    The search runs in a single request and rows are parsed as they are
+    streamed, no search job is created, polled or paginated.
+
+    Arguments:
+    base_url -- Splunk instance base URL.
+    token -- Splunk access token.
+    query -- The search query.
+
+    Keyword arguments:
+    earliest_time -- Earliest time for the search.
+    latest_time -- Latest time for the search.
+    page_size -- Rows per yielded page. Default: 1000.
+    kwargs -- Additional search parameters.
+
+    Yields:
+    list -- A page of results.
+    """
+    client = get_client(base_url, token)
+    payload = {
+        "search": query,
+        "earliest_time": earliest_time,
+        "latest_time": latest_time,
+        "output_mode": "json",
+        **kwargs
+    }
+
+    logging.info("Starting export search...")
+    try:
+        # Read-only search, safe to retry before streaming starts
+        response = client.post(SEARCH_JOBS_EXPORT_V2, data=payload,
+                               stream=True, operation=metrics.OP_EXPORT,
+                               idempotent=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logging.error(
+            f"Request to {client.url(SEARCH_JOBS_EXPORT_V2)} failed: {e}")
+        raise
+
+    total = 0
+    page = []
+    with response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            metrics.inc("bytes_received", len(line) + 1)
+            row = json.loads(line)
+
+            for message in row.get("messages") or []:
+                if message.get("type") in ("ERROR", "FATAL"):
+                    raise Exception(
+                        f"Export search failed: {message.get('text')}")
+                logging.debug(f"Export message: {message}")
+
+            # Skip preview rows of transforming searches
+            if row.get("preview") or "result" not in row:
+                continue
+
+            page.append(row["result"])
+            metrics.inc("results_fetched")
+            if len(page) >= page_size:
+                total += len(page)
+                print(f"Exported {len(page)} results (Total: {total})")
+                yield page
+                page = []
+
+    if page:
+        total += len(page)
+        print(f"Exported {len(page)} results (Total: {total})")
+        yield page
+    print("Export finished.")
+
+
 def search_jobs_sid_events(
         base_url,
         token,
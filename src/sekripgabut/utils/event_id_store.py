@@ -0,0 +1,222 @@
+import heapq
+import re
+
+
+# Record: flag byte, 16 bytes UUID, 16 bytes MD5 digest
+RECORD_SIZE = 33
+SORT_RUN_SIZE = 1 << 16
+
+# Flags of a record, how to format the original event ID back
+FLAG_LOWER_UUID = 0x01
+FLAG_UPPER_DIGEST = 0x02
+# The event ID does not fit the record, it is kept in the fallback list
+FLAG_FALLBACK = 0x80
+
+NOTABLE_EVENT_ID_PATTERN = re.compile(
+    r"([0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-"
+    r"[0-9A-Fa-f]{12})@@notable@@([0-9A-Fa-f]{32})")
+
+
+class EventIdStore:
+    """
+    Compact container of notable event IDs.
+
+    An event ID like `<UUID>@@notable@@<md5>` takes a 33 byte record in a
+    single `bytearray` instead of a ~120 byte Python string, so millions
+    of them fit in a few hundred MB. Event IDs of any other shape are kept
+    as strings in a fallback list, every event ID reads back exactly as it
+    was added.
+
+        store = EventIdStore(event_ids)
+        store.dedup()
+        for batch in store.batches(8000):
+            ...
+
+    Arguments:
+        event_ids -- Event IDs to add. Default: none.
+    """
+
+    def __init__(self, event_ids=()):
+        self.buffer = bytearray()
+        self.fallbacks = []
+        self._fallback_index = {}
+        self.extend(event_ids)
+
+    def __len__(self):
+        return len(self.buffer) // RECORD_SIZE
+
+    def __iter__(self):
+        buffer = self.buffer
+        for start in range(0, len(buffer), RECORD_SIZE):
+            yield self._decode(buffer[start:start + RECORD_SIZE])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("EventIdStore index out of range")
+        start = index * RECORD_SIZE
+        return self._decode(self.buffer[start:start + RECORD_SIZE])
+
+    def __getstate__(self):
+        # Pickled as the packed buffer, e.g. from a process pool worker
+        return {"buffer": self.buffer, "fallbacks": self.fallbacks}
+
+    def __setstate__(self, state):
+        self.buffer = state["buffer"]
+        self.fallbacks = state["fallbacks"]
+        self._fallback_index = {
+            event_id: i for i, event_id in enumerate(self.fallbacks)}
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the records and fallbacks."""
+        return len(self.buffer) + sum(
+            len(event_id) + 49 for event_id in self.fallbacks)
+
+    def add(self, event_id):
+        """Append {event_id}."""
+        self.buffer += self._encode(event_id)
+
+    def extend(self, event_ids):
+        """Append every event ID of {event_ids}, another store included."""
+        if isinstance(event_ids, EventIdStore):
+            self._extend_store(event_ids)
+            return
+        encode = self._encode
+        self.buffer += b"".join(encode(event_id) for event_id in event_ids)
+
+    def sort(self):
+        """
+        Sort the records in place.
+
+        Records are ordered by their bytes, so the order is stable across
+        runs but not alphabetical. Runs of SORT_RUN_SIZE records are
+        sorted in place one at a time, then merged record by record into
+        a new buffer of the same size. The extra memory is that buffer,
+        33 MB per million event IDs, plus a few MB for one run.
+        """
+        self._merge_runs(dedup=False)
+
+    def dedup(self):
+        """
+        Sort the records and drop duplicate event IDs, in one merge.
+
+        Returns:
+            int -- Number of duplicates dropped.
+        """
+        count = len(self)
+        self._merge_runs(dedup=True)
+        return count - len(self)
+
+    def batches(self, batch_size):
+        """
+        Slice the event IDs into batches.
+
+        Yields:
+            list -- Event ID strings, the last batch may be shorter.
+        """
+        for start in range(0, len(self), batch_size):
+            yield self[start:start + batch_size]
+
+    def _merge_runs(self, dedup):
+        buffer = self.buffer
+        run_bytes = SORT_RUN_SIZE * RECORD_SIZE
+        runs = []
+        for start in range(0, len(buffer), run_bytes):
+            end = min(start + run_bytes, len(buffer))
+            # Only one run is unpacked into record objects at a time
+            buffer[start:end] = b"".join(
+                sorted(_records(buffer, start, end)))
+            runs.append((start, end))
+        if len(runs) < 2 and not dedup:
+            return
+
+        merged = bytearray(len(buffer))
+        view = memoryview(merged)
+        position = 0
+        previous = None
+        for record in heapq.merge(*(
+                _records(buffer, start, end) for start, end in runs)):
+            if dedup and record == previous:
+                continue
+            view[position:position + RECORD_SIZE] = record
+            position += RECORD_SIZE
+            previous = record
+        view.release()
+        del merged[position:]
+        self.buffer = merged
+
+    def _encode(self, event_id):
+        match = NOTABLE_EVENT_ID_PATTERN.fullmatch(event_id)
+        flag = None
+        if match:
+            uuid, digest = match.groups()
+            flag = _case_flag(uuid, FLAG_LOWER_UUID, 0)
+            digest_flag = _case_flag(digest, 0, FLAG_UPPER_DIGEST)
+            if flag is not None and digest_flag is not None:
+                flag |= digest_flag
+            else:
+                flag = None
+        if flag is None:
+            return self._encode_fallback(event_id)
+        return (bytes((flag,)) + bytes.fromhex(uuid.replace("-", ""))
+                + bytes.fromhex(digest))
+
+    def _encode_fallback(self, event_id):
+        index = self._fallback_index.get(event_id)
+        if index is None:
+            index = len(self.fallbacks)
+            self.fallbacks.append(event_id)
+            self._fallback_index[event_id] = index
+        return bytes((FLAG_FALLBACK,)) + index.to_bytes(
+            RECORD_SIZE - 1, "big")
+
+    def _decode(self, record):
+        flag = record[0]
+        if flag & FLAG_FALLBACK:
+            return self.fallbacks[int.from_bytes(record[1:], "big")]
+        uuid = record[1:17].hex()
+        uuid = (f"{uuid[:8]}-{uuid[8:12]}-{uuid[12:16]}-"
+                f"{uuid[16:20]}-{uuid[20:]}")
+        digest = record[17:].hex()
+        if not flag & FLAG_LOWER_UUID:
+            uuid = uuid.upper()
+        if flag & FLAG_UPPER_DIGEST:
+            digest = digest.upper()
+        return f"{uuid}@@notable@@{digest}"
+
+    def _extend_store(self, other):
+        if not other.fallbacks:
+            self.buffer += other.buffer
+            return
+        # Fallback indexes point into the other store's list, remap them
+        records = bytearray(other.buffer)
+        for start in range(0, len(records), RECORD_SIZE):
+            if records[start] & FLAG_FALLBACK:
+                index = int.from_bytes(
+                    records[start + 1:start + RECORD_SIZE], "big")
+                records[start:start + RECORD_SIZE] = self._encode_fallback(
+                    other.fallbacks[index])
+        self.buffer += records
+
+
+def _case_flag(value, lower_flag, upper_flag):
+    # Hex digits only read back the same either way
+    if value == value.upper():
+        return upper_flag
+    if value == value.lower():
+        return lower_flag
+    return None
+
+
+def _records(buffer, start=0, end=None):
+    view = memoryview(buffer)
+    try:
+        for offset in range(start, len(view) if end is None else end,
+                            RECORD_SIZE):
+            yield bytes(view[offset:offset + RECORD_SIZE])
+    finally:
+        view.release()
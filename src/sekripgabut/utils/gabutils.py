@@ -1,9 +1,24 @@
 import configparser
 from datetime import datetime, timedelta, timezone
+import gzip
+import io
 import re
 import json
 import logging
 import os
+import queue
+import threading
+
+
+# Output formats
+OUTPUT_JSON = "json"
+OUTPUT_NDJSON = "ndjson"
+OUTPUT_FORMATS = (OUTPUT_JSON, OUTPUT_NDJSON)
+
+# NDJSON compressions
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSIONS = (COMPRESSION_GZIP, COMPRESSION_ZSTD)
 
 
 def setup_logging(log_file="app.log", log_level=logging.INFO):
@@ -256,3 +271,191 @@ def write_to_json_file(data, file_path, mode='w'):
     except Exception as e:
         print(f"Error writing to JSON file: {e}")
         return False
+
+
+def write_pages_to_json_file(pages, file_path):
+    """
+    Stream pages of rows into a JSON array file, one page at a time.
+
+    The output is the same as `write_to_json_file` on the concatenated
+    pages, but only one page is held in memory. A partially written file
+    is removed on failure.
+
+    Args:
+        pages (iterable): Iterable of lists of rows.
+        file_path (str): Path to the JSON file.
+
+    Returns:
+        bool: True if the file was written successfully, False otherwise.
+    """
+    try:
+        with open(file_path, 'w') as file:
+            file.write("[")
+            first = True
+            for page in pages:
+                for row in page:
+                    file.write("\n" if first else ",\n")
+                    first = False
+                    row_json = json.dumps(row, indent=4)
+                    file.write("    " + row_json.replace("\n", "\n    "))
+            file.write("]" if first else "\n]")
+        print(f"Data successfully written to {file_path}")
+        return True
+    except Exception as e:
+        print(f"Error writing to JSON file: {e}")
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return False
+
+
+def output_file_extension(output_format=OUTPUT_JSON, compression=None):
+    """File extension of an output format, e.g. ".ndjson.gz"."""
+    if output_format == OUTPUT_JSON:
+        return ".json"
+    return {
+        None: ".ndjson",
+        COMPRESSION_GZIP: ".ndjson.gz",
+        COMPRESSION_ZSTD: ".ndjson.zst",
+    }[compression]
+
+
+def open_ndjson_file(file_path, mode='a', compression=None):
+    """
+    Open a (compressed) NDJSON file in text mode.
+
+    Appending to a compressed file adds a new gzip member or zstd frame,
+    so nothing already written is read back.
+
+    Args:
+        file_path (str): Path to the NDJSON file.
+        mode (str): 'w', 'a' or 'r'. Defaults to 'a'.
+        compression (str): None, "gzip" or "zstd". Defaults to None.
+
+    Returns:
+        file object: Text file object.
+    """
+    if mode not in ('w', 'a', 'r'):
+        raise ValueError("Mode must be 'w', 'a' or 'r'.")
+
+    if compression is None:
+        return open(file_path, mode)
+    if compression == COMPRESSION_GZIP:
+        return gzip.open(file_path, mode + 't')
+    if compression == COMPRESSION_ZSTD:
+        # Imported on first use, most runs never need it
+        try:
+            import zstandard
+        except ImportError:  # Optional dependency, sekripgabut[zstd]
+            raise ImportError(
+                "zstandard is required for zstd compression, install it with "
+                "'pip install sekripgabut[zstd]'")
+        if mode == 'r':
+            raw = open(file_path, 'rb')
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                raw, read_across_frames=True, closefd=True)
+            return io.TextIOWrapper(reader)
+        return zstandard.open(file_path, mode + 't')
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def write_pages_to_ndjson_file(pages, file_path, mode='w', compression=None):
+    """
+    Write pages of rows to a newline-delimited JSON file as they arrive.
+
+    Each row is one compact JSON line, so appending costs the same
+    whatever the file size and only one page is held in memory.
+
+    Args:
+        pages (iterable): Iterable of lists of rows.
+        file_path (str): Path to the NDJSON file.
+        mode (str): 'w' to overwrite, 'a' to append. Defaults to 'w'.
+        compression (str): None, "gzip" or "zstd". Defaults to None.
+
+    Returns:
+        bool: True if the file was written successfully, False otherwise.
+    """
+    try:
+        if mode not in ('w', 'a'):
+            raise ValueError("Mode must be 'w' for write or 'a' for append.")
+
+        with open_ndjson_file(file_path, mode, compression) as file:
+            for page in pages:
+                file.write("".join(
+                    json.dumps(row, separators=(",", ":")) + "\n"
+                    for row in page
+                ))
+        print(f"Data successfully written to {file_path}")
+        return True
+    except Exception as e:
+        print(f"Error writing to NDJSON file: {e}")
+        if mode == 'w' and os.path.exists(file_path):
+            os.remove(file_path)
+        return False
+
+
+def write_pages_to_file(pages, file_path, output_format=OUTPUT_JSON,
+                        compression=None):
+    """
+    Write pages of rows to a JSON array or NDJSON file.
+
+    Returns:
+        bool: True if the file was written successfully, False otherwise.
+    """
+    if output_format == OUTPUT_NDJSON:
+        return write_pages_to_ndjson_file(
+            pages, file_path, compression=compression)
+    return write_pages_to_json_file(pages, file_path)
+
+
+_PREFETCH_DONE = object()
+
+
+def iter_prefetch(iterable, size=1):
+    """
+    Iterate {iterable} while a background thread reads up to {size} items
+    ahead of the consumer.
+
+    Exceptions raised by {iterable} are re-raised to the consumer at the
+    position they happened.
+
+    Args:
+        iterable (iterable): Source items, e.g. result pages.
+        size (int): Max items buffered ahead. Defaults to 1.
+
+    Yields:
+        Items of {iterable}, in order.
+    """
+    buffer = queue.Queue(maxsize=max(1, size))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+            return
+        put((_PREFETCH_DONE, None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _PREFETCH_DONE:
+                break
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+PROMETHEUS_PREFIX = "sekripgabut"
+
+# Operation names
+OP_DISPATCH = "dispatch"
+OP_POLL = "poll"
+OP_RESULTS_PAGE = "results_page"
+OP_EXPORT = "export"
+OP_NOTABLE_UPDATE = "notable_update"
+OP_HTTP = "http"
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, not thread-safe by itself."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimated {q} quantile, the upper bound of its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe run metrics: latency histograms, counters and gauges.
+
+    Gauges keep the last and the max value, e.g. queue depth.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._started = time.monotonic()
+            self.histograms = {}
+            self.counters = {}
+            self.gauges = {}
+
+    def observe(self, name, seconds):
+        """Record a {name} latency of {seconds}."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timed(self, name):
+        """Record the latency of the `with` block, even when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def inc(self, name, value=1):
+        """Add {value} to the {name} counter."""
+        if not value:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """Set the {name} gauge."""
+        with self._lock:
+            gauge = self.gauges.setdefault(name, {"last": value, "max": value})
+            gauge["last"] = value
+            gauge["max"] = max(gauge["max"], value)
+
+    def summary(self):
+        """
+        Summary of the run so far.
+
+        Returns:
+            dict -- elapsed seconds, events_closed_per_second, latency per
+            operation, counters and gauges.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            closed = self.counters.get("events_closed", 0)
+            return {
+                "started": self.started,
+                "elapsed": round(elapsed, 3),
+                "events_closed_per_second": (
+                    round(closed / elapsed, 3) if elapsed else None),
+                "latency": {
+                    name: histogram.summary()
+                    for name, histogram in sorted(self.histograms.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": {
+                    name: dict(gauge)
+                    for name, gauge in sorted(self.gauges.items())
+                },
+            }
+
+    def write_json(self, file_path):
+        """Write the summary to a JSON file."""
+        _write_atomic(file_path, json.dumps(self.summary(), indent=4))
+        logging.info(f"Metrics summary written to: {file_path}")
+
+    def write_prometheus(self, file_path):
+        """
+        Write the metrics in the Prometheus text format, for the
+        node_exporter textfile collector.
+        """
+        _write_atomic(file_path, self.prometheus_text())
+        logging.info(f"Prometheus metrics written to: {file_path}")
+
+    def prometheus_text(self):
+        prefix = PROMETHEUS_PREFIX
+        lines = []
+        with self._lock:
+            name = f"{prefix}_operation_duration_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for operation, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{operation="{operation}",'
+                        f'le="{bound}"}} {cumulative}')
+                lines.append(
+                    f'{name}_bucket{{operation="{operation}",le="+Inf"}} '
+                    f'{histogram.count}')
+                lines.append(
+                    f'{name}_sum{{operation="{operation}"}} {histogram.sum}')
+                lines.append(
+                    f'{name}_count{{operation="{operation}"}} '
+                    f'{histogram.count}')
+
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{counter}_total counter")
+                lines.append(f"{prefix}_{counter}_total {value}")
+
+            for gauge, values in sorted(self.gauges.items()):
+                lines.append(f"# TYPE {prefix}_{gauge} gauge")
+                lines.append(f"{prefix}_{gauge} {values['last']}")
+                lines.append(f"# TYPE {prefix}_{gauge}_max gauge")
+                lines.append(f"{prefix}_{gauge}_max {values['max']}")
+
+            lines.append(f"# TYPE {prefix}_run_started_seconds gauge")
+            lines.append(f"{prefix}_run_started_seconds {self.started}")
+            lines.append(f"# TYPE {prefix}_run_elapsed_seconds gauge")
+            lines.append(
+                f"{prefix}_run_elapsed_seconds "
+                f"{time.monotonic() - self._started}")
+        return "\n".join(lines) + "\n"
+
+
+def _write_atomic(file_path, text):
+    # Scrapers never see a half written file
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    os.replace(tmp_path, file_path)
+
+
+# Process wide registry
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """Get the process wide `MetricsRegistry`."""
+    return _registry
+
+
+def observe(name, seconds):
+    _registry.observe(name, seconds)
+
+
+def timed(name):
+    return _registry.timed(name)
+
+
+def inc(name, value=1):
+    _registry.inc(name, value)
+
+
+def set_gauge(name, value):
+    _registry.set_gauge(name, value)
@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Max tokens kept, the allowed burst. Defaults to
+            {rate}.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("Rate must be greater than 0.")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Take {tokens} from the bucket, wait until they are available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self._take(tokens)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens=1):
+        """
+        Take {tokens} from the bucket, await until they are available
+        without blocking the event loop.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        import asyncio
+
+        waited = 0.0
+        while True:
+            delay = self._take(tokens)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def _take(self, tokens):
+        # Take the tokens and return 0, or return the seconds to wait
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
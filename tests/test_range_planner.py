@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from sekripgabut.helpers import range_planner
+
+
+WIB = timezone(timedelta(hours=7))
+
+
+def _fake_search(calls, rows):
+    def splunk_search(base_url, token, query, earliest_time="",
+                      latest_time="now", **kwargs):
+        calls.append({"earliest_time": earliest_time,
+                      "latest_time": latest_time})
+        return rows
+    return splunk_search
+
+
+def test_plan_ranges_keeps_now_for_a_time_zone_ahead_of_utc(monkeypatch):
+    # Splunk answers in the user time zone, WIB is hours ahead of the
+    # UTC "now" the planner resolves
+    local_now = datetime.now(WIB).replace(minute=0, second=0, microsecond=0)
+    rows = [
+        {"_time": (local_now - timedelta(days=1)).isoformat(),
+         "count": "10"},
+        {"_time": local_now.isoformat(), "count": "5"},
+    ]
+    calls = []
+    monkeypatch.setattr(
+        range_planner.splunk_helpers, "splunk_search",
+        _fake_search(calls, rows))
+
+    earliest = (local_now - timedelta(days=2)).strftime(
+        range_planner.RANGE_TIME_FORMAT)
+    ranges = range_planner.plan_ranges(
+        "https://splunk", "token", earliest, "now", target_events=100)
+
+    assert calls[0]["latest_time"] == "now"
+    assert ranges[-1]["end"] == "now"
+    assert sum(date["count"] for date in ranges) == 15
+
+
+def test_plan_ranges_keeps_a_fixed_latest_time(monkeypatch):
+    rows = [{"_time": "2024-01-01T10:00:00.000+07:00", "count": "10"}]
+    calls = []
+    monkeypatch.setattr(
+        range_planner.splunk_helpers, "splunk_search",
+        _fake_search(calls, rows))
+
+    ranges = range_planner.plan_ranges(
+        "https://splunk", "token", "2024-01-01T00:00:00",
+        "2024-01-02T00:00:00", target_events=100)
+
+    assert calls[0]["latest_time"] == "2024-01-02T00:00:00"
+    assert ranges == [{
+        "start": "2024-01-01T00:00:00",
+        "end": "2024-01-01T23:59:59",
+        "count": 10,
+    }]
+
+
+def test_skip_empty_ranges_keeps_a_range_ending_now():
+    local_now = datetime.now(WIB).replace(
+        minute=0, second=0, microsecond=0, tzinfo=None)
+    ranges = [{"start": (local_now - timedelta(hours=1)).strftime(
+        range_planner.RANGE_TIME_FORMAT), "end": "now"}]
+
+    kept = range_planner.skip_empty_ranges(
+        ranges, [(local_now, 3)], span=3600)
+
+    assert kept == ranges